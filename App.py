@@ -26,6 +26,7 @@ try:
     from function.jurnal_penutup import show_jurnal_penutup
     from function.jurnal_saldo_setelah_penutupan import show_jurnal_saldo_setelah_penutupan
     from function.neraca import show_neraca
+    from function.tutup_periode import show_tutup_periode
     from function.buku_besar import show_buku_besar
     from function.neraca_lajur import show_neraca_lajur
     from function.lap_labarugi import show_lap_labarugi
@@ -33,6 +34,7 @@ try:
     from function.dashboard import show_dashboard
     from function.profile import show_profile
     from function.auth import show_login, is_logged_in, logout
+    from function.pipeline import last_rebuilt
     
 except ImportError:
     
@@ -42,6 +44,7 @@ except ImportError:
     show_jurnal_penutup = None
     show_jurnal_saldo_setelah_penutupan = None
     show_neraca = None
+    show_tutup_periode = None
     show_buku_besar = None
     show_neraca_lajur = None
     show_lap_labarugi = None
@@ -51,6 +54,7 @@ except ImportError:
     show_login = None
     is_logged_in = None
     logout = None
+    last_rebuilt = None
 
 
 def ensure_dir(directory):
@@ -75,6 +79,57 @@ def show_home():
     
     return selected
 
+SIKLUS_PAGES = [
+    ("Neraca Saldo Periode Sebelumnya", "show_neraca_saldo_periode_sebelumnya"),
+    ("Jurnal Umum", "show_jurnal_umum"),
+    ("Buku Besar", "show_buku_besar"),
+    ("Neraca Saldo", "show_neraca_saldo"),
+    ("Neraca Lajur", "show_neraca_lajur"),
+    ("Jurnal Penutup", "show_jurnal_penutup"),
+    ("Jurnal Saldo Setelah Penutupan", "show_jurnal_saldo_setelah_penutupan"),
+    ("Neraca", "show_neraca"),
+    ("Tutup Periode", "show_tutup_periode"),
+]
+
+LAPORAN_PAGES = [
+    ("Laporan Laba Rugi", "show_lap_labarugi"),
+    ("Laporan Perubahan Modal", "show_lap_perubahanmodal"),
+]
+
+
+def show_report_page(pages, key):
+
+    labels = [label for label, _ in pages]
+    last_key = f"{key}_last"
+    
+    
+    if st.session_state.get(key) not in labels:
+        st.session_state[key] = st.session_state.get(last_key, labels[0])
+    
+    
+    if hasattr(st, "segmented_control"):
+        selected_label = st.segmented_control("Pilih laporan:", labels, key=key, label_visibility="collapsed")
+    else:
+        selected_label = st.radio("Pilih laporan:", labels, key=key, horizontal=True, label_visibility="collapsed")
+    
+    if selected_label is None:
+        selected_label = st.session_state.get(last_key, labels[0])
+    st.session_state[last_key] = selected_label
+    
+    
+    show_function = globals().get(dict(pages)[selected_label])
+    if show_function:
+        show_function()
+    else:
+        st.error("Module not found. Please restart the application after the files have been created.")
+    
+    
+    if last_rebuilt:
+        rebuilt = last_rebuilt()
+        if not rebuilt.empty:
+            with st.expander("Laporan yang dihitung ulang"):
+                st.dataframe(rebuilt, hide_index=True)
+
 def show_content(selected):
 
     if selected == "Dashboard":
@@ -104,77 +159,13 @@ def show_content(selected):
         
         if keuangan_option == "Siklus":
             st.subheader("Laporan Keuangan per Siklus")
-            
-            
-            tabs = st.tabs(["Neraca Saldo Periode Sebelumnya", "Jurnal Umum", "Buku Besar", "Neraca Saldo", "Neraca Lajur", "Jurnal Penutup", "Jurnal Saldo Setelah Penutupan", "Neraca", ])
-            with tabs[0]:  
-                if show_neraca_saldo_periode_sebelumnya:
-                    show_neraca_saldo_periode_sebelumnya()
-                else:
-                    st.error("Module not found. Please restart the application after the files have been created.")
-            
-            with tabs[1]:  
-                if show_jurnal_umum:
-                    show_jurnal_umum()
-                else:
-                    st.error("Module not found. Please restart the application after the files have been created.")
-            
-            with tabs[2]:  
-                if show_buku_besar:
-                    show_buku_besar()
-                else:
-                    st.error("Module not found. Please restart the application after the files have been created.")
-                
-            with tabs[3]:  
-                if show_neraca_saldo:
-                    show_neraca_saldo()
-                else:
-                    st.error("Module not found. Please restart the application after the files have been created.")
-            
-            with tabs[4]:  
-                if show_neraca_lajur:
-                    show_neraca_lajur()
-                else:
-                    st.error("Module not found. Please restart the application after the files have been created.")
-                
-            with tabs[5]:  
-                if show_jurnal_penutup:
-                    show_jurnal_penutup()
-                else:
-                    st.error("Module not found. Please restart the application after the files have been created.")
-                
-            with tabs[6]:  
-                if show_jurnal_saldo_setelah_penutupan:
-                    show_jurnal_saldo_setelah_penutupan()
-                else:
-                    st.error("Module not found. Please restart the application after the files have been created.")
-                
-            with tabs[7]:  
-                if show_neraca:
-                    show_neraca()
-                else:
-                    st.error("Module not found. Please restart the application after the files have been created.")
-                
+            show_report_page(SIKLUS_PAGES, "siklus_page")
             
         elif keuangan_option == "Laporan":
             
             
             st.subheader("Laporan Keuangan")
-            
-            
-            tabs = st.tabs(["Laporan Laba Rugi", "Laporan Perubahan Modal"])
-           
-            with tabs[0]:  
-                if show_lap_labarugi:
-                    show_lap_labarugi()
-                else:
-                    st.error("Module not found. Please restart the application after the files have been created.")
-            
-            with tabs[1]:  
-                if show_lap_perubahanmodal:
-                    show_lap_perubahanmodal()
-                else:
-                    st.error("Module not found. Please restart the application after the files have been created.")
+            show_report_page(LAPORAN_PAGES, "laporan_page")
 
 def main():
 
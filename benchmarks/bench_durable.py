@@ -0,0 +1,121 @@
+# Compares durable writes against naive ones on a copy of database/.
+#
+#   python benchmarks/bench_durable.py
+#   SLOW_FSYNC=4 python benchmarks/bench_durable.py    # 4 ms per fsync, like a slow disk
+#
+# Full saves: naive open('w') vs temp file + fsync + os.replace.
+# Journal appends: naive append vs fsync per append vs group commit.
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if os.environ.get('SLOW_FSYNC'):
+    _fsync = os.fsync
+
+    def slow_fsync(fd):
+        time.sleep(float(os.environ['SLOW_FSYNC']) / 1000)
+        _fsync(fd)
+    os.fsync = slow_fsync
+
+import function.storage as storage
+import function.durable as durable
+
+
+DATABASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database')
+
+
+def naive_write(path, text):
+
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        f.write(text)
+
+def naive_append(path, text, wait=True):
+
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        f.write(text)
+    return None if wait else (lambda: None)
+
+def fsync_append(path, text, wait=True):
+
+    durable.append_file(path, text)
+    return None if wait else (lambda: None)
+
+APPEND_MODES = {
+    'naive': (naive_append, lambda path: None),
+    'fsync': (fsync_append, lambda path: None),
+    'group commit': (durable.append_text, durable.flush_path)
+}
+
+
+def copy_database():
+
+    directory = tempfile.mkdtemp()
+    shutil.copytree(DATABASE_DIR, os.path.join(directory, 'database'), ignore=shutil.ignore_patterns('*.db*', '*_log.csv', 'bukubesar'))
+    return directory
+
+def run_threads(threads, worker):
+
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return time.perf_counter() - start
+
+def bench_saves(frame, threads, per_thread):
+
+    directory = tempfile.mkdtemp()
+    text = frame.to_csv(index=False)
+    result = {}
+    for name, write in [('naive', naive_write), ('atomic+fsync', durable.replace_file)]:
+        seconds = run_threads(threads, lambda t: [write(os.path.join(directory, f't{t}.csv'), text) for _ in range(per_thread)])
+        result[name] = threads * per_thread / seconds
+    shutil.rmtree(directory)
+    return result
+
+def bench_appends(mode, threads, per_thread):
+
+    directory = copy_database()
+    storage.set_storage(storage.CsvStorage(os.path.join(directory, 'database')))
+    storage.LOG_COMPACT_THRESHOLD = 10 ** 9
+    storage.append_text, storage.flush_path = APPEND_MODES[mode]
+    before = durable.commit_stats()
+
+    def worker(t):
+        for _ in range(per_thread):
+            storage.add_rows('jurnal_umum', [
+                {'Tanggal': '2025-03-31', 'Keterangan': 'Kas', 'Debet': 1, 'Kredit': 0},
+                {'Tanggal': None, 'Keterangan': 'Modal', 'Debet': 0, 'Kredit': 1}
+            ])
+    seconds = run_threads(threads, worker)
+    batches = durable.commit_stats()['batches'] - before['batches']
+    shutil.rmtree(directory)
+    return threads * per_thread / seconds, batches
+
+
+if __name__ == '__main__':
+    directory = copy_database()
+    storage.set_storage(storage.CsvStorage(os.path.join(directory, 'database')))
+    jurnal = storage.load_table('jurnal_umum')
+    shutil.rmtree(directory)
+
+    print('Simpan tabel penuh (simpan/detik)')
+    for label, frame, per_thread in [('39 baris', jurnal, 40), ('19.500 baris', pd.concat([jurnal] * 500, ignore_index=True), 10)]:
+        for threads in [1, 16]:
+            result = bench_saves(frame, threads, per_thread)
+            print(f'  {label:12s} {threads:2d} sesi | ' + ' | '.join(f'{name}: {ops:8.0f}' for name, ops in result.items()))
+
+    print('Tambah entri jurnal (entri/detik)')
+    for threads in [1, 16]:
+        row = []
+        for mode in APPEND_MODES:
+            ops, batches = bench_appends(mode, threads, 30)
+            row.append(f'{mode}: {ops:6.0f}' + (f' ({batches} batch)' if mode == 'group commit' else ''))
+        print(f'  {threads:2d} sesi | ' + ' | '.join(row))
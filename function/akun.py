@@ -0,0 +1,99 @@
+import pandas as pd
+import threading
+from function.storage import load_table, table_version
+from function.pipeline import register_source
+
+
+_registry = {'version': None}
+_lock = threading.Lock()
+
+
+def normalize_account_names(names):
+
+    return names.fillna('').astype(str).str.lower().str.replace(r'[^a-z0-9]', '', regex=True)
+
+def build_registry(df):
+
+    df = df.dropna(subset=['Akun']).copy()
+    df['Kode'] = df['Kode'].astype(str).str.replace(r'\.0$', '', regex=True)
+    df['Akun'] = normalize_account_names(df['Akun'])
+    df['Urutan'] = range(len(df))
+    akun_df = df.set_index('Akun')
+
+
+    # Journal lines may name an account by slug, display name or code; all
+    # three normalize to a key in one lookup map.
+    lookup = dict(zip(normalize_account_names(df['Kode']), df['Akun']))
+    lookup.update(zip(normalize_account_names(df['Nama Akun']), df['Akun']))
+    lookup.update(zip(df['Akun'], df['Akun']))
+
+    return {
+        'df': akun_df,
+        'by_slug': akun_df.to_dict('index'),
+        'by_kode': dict(zip(df['Kode'], df['Akun'])),
+        'lookup': lookup
+    }
+
+def get_registry():
+
+    version = table_version('akun')
+    with _lock:
+        if _registry['version'] != version:
+            _registry.update(build_registry(load_table('akun')), version=version)
+        return _registry
+
+def akun_kelompok(akun_df, kelompok):
+
+    return list(akun_df.index[akun_df['Kelompok'] == kelompok])
+
+def missing_kelompok(akun_df, kelompok):
+
+    return [nama for nama in kelompok if not akun_kelompok(akun_df, nama)]
+
+def kelompok_message(missing):
+
+    return f"Daftar akun belum memiliki akun dengan Kelompok {', '.join(missing)}. Tambahkan akunnya di database/akun.csv."
+
+def get_akun_df():
+
+    return get_registry()['df'].copy()
+
+def list_akun():
+
+    return list(get_registry()['df'].index)
+
+def get_akun(slug):
+
+    return get_registry()['by_slug'].get(slug)
+
+def get_akun_by_kode(kode):
+
+    slug = get_registry()['by_kode'].get(str(kode))
+    return get_akun(slug) if slug else None
+
+def get_nama_akun(slug):
+
+    akun = get_akun(slug)
+    return akun['Nama Akun'] if akun else slug
+
+def get_nama_akun_list():
+
+    return list(get_registry()['df']['Nama Akun'])
+
+def get_akun_options(current=None):
+
+    names = get_nama_akun_list()
+    if current is None or pd.isna(current) or str(current).strip() == '':
+        return names, 0
+    akun = get_akun(resolve_account_names(pd.Series([current])).iloc[0])
+    if akun:
+        return names, names.index(akun['Nama Akun'])
+    return [current] + names, 0
+
+def resolve_account_names(names):
+
+    normalized = normalize_account_names(names)
+    return normalized.map(get_registry()['lookup']).fillna(normalized)
+
+
+register_source('akun', lambda: table_version('akun'), get_akun_df)
@@ -4,6 +4,7 @@ import pandas as pd
 import os
 import json
 from datetime import datetime
+from function.durable import replace_file
 
 def ensure_dir(directory):
     if not os.path.exists(directory):
@@ -26,8 +27,7 @@ def load_users():
                 "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             }
         }
-        with open(users_file, 'w') as f:
-            json.dump(default_users, f, indent=4)
+        replace_file(users_file, json.dumps(default_users, indent=4))
         return default_users
     
     with open(users_file, 'r') as f:
@@ -35,8 +35,7 @@ def load_users():
 
 def save_users(users):
 
-    with open(get_users_file_path(), 'w') as f:
-        json.dump(users, f, indent=4)
+    replace_file(get_users_file_path(), json.dumps(users, indent=4))
 
 def check_credentials(username, password):
 
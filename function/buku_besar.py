@@ -3,31 +3,21 @@ from streamlit_option_menu import option_menu
 import pandas as pd
 import os
 import sys
-import re
+from function.formatting import format_rupiah, rupiah
+from function.tanggal import format_tanggal
+from function.posting import get_ledgers, build_ledger_sheet, build_running_balance, balance_as_of, get_ledger_last_date
+from function.posting import post_journal, group_ledgers, ledger_sheet, saldo_awal_of, periode_awal, LEDGER_COLUMNS
+from function.akun import get_akun, get_nama_akun, list_akun
+from function.storage import load_table, save_table, add_row, update_row, delete_row, register_buku_besar_table, load_period
+from function.durable import replace_file
 
 
 def ensure_dir(directory):
     if not os.path.exists(directory):
         os.makedirs(directory)
 
-def get_account_name_from_filename(filename):
-
-    if filename.startswith('bukbes_'):
-        return filename.replace('bukbes_', '').replace('.csv', '')
-    elif filename.startswith('bukbes.'):
-        return filename.replace('bukbes.', '').replace('.csv', '')
-    else:
-        return filename.replace('.csv', '')
-
 def get_filename_from_account(account):
 
-    
-    if account.startswith('beban'):
-        
-        if os.path.exists(os.path.join(get_bukubesar_dir(), f'bukbes.{account}.csv')):
-            return f'bukbes.{account}.csv'
-    
-    
     return f'bukbes_{account}.csv'
 
 def get_bukubesar_dir():
@@ -38,395 +28,186 @@ def get_bukubesar_dir():
     ensure_dir(database_dir)
     return database_dir
 
+def get_buku_besar_table(akun):
+
+    return register_buku_besar_table(akun, get_filename_from_account(akun))
+
 def load_buku_besar_data(akun):
 
-    database_dir = get_bukubesar_dir()
-    
-    
-    filename = get_filename_from_account(akun)
-    csv_path = os.path.join(database_dir, filename)
-    
-    
-    if not os.path.exists(csv_path) and akun.startswith('beban'):
-        alternative_filename = f'bukbes.{akun}.csv'
-        alternative_path = os.path.join(database_dir, alternative_filename)
-        if os.path.exists(alternative_path):
-            csv_path = alternative_path
-    
-    
-    if os.path.exists(csv_path):
-        return pd.read_csv(csv_path)
-    else:
-        
-        return pd.DataFrame(columns=['Tanggal', 'Debet', 'Tanggal', 'Kredit'])
+    get_buku_besar_table(akun)
+    return load_table(f'bukbes_{akun}')
 
 def save_buku_besar_data(df, akun):
 
-    database_dir = get_bukubesar_dir()
-    
-    
-    filename = get_filename_from_account(akun)
-    csv_path = os.path.join(database_dir, filename)
-    
-    
-    if not os.path.exists(csv_path) and akun.startswith('beban'):
-        alternative_filename = f'bukbes.{akun}.csv'
-        alternative_path = os.path.join(database_dir, alternative_filename)
-        if os.path.exists(alternative_path):
-            csv_path = alternative_path
-    
-    df.to_csv(csv_path, index=False)
+    get_buku_besar_table(akun)
+    save_table(f'bukbes_{akun}', df)
 
 def add_data(akun, tanggal_debet, debet, tanggal_kredit, kredit):
-    df = load_buku_besar_data(akun)
-    
-    
-    tanggal_kredit_col = 'Tanggal.1' if 'Tanggal.1' in df.columns else 'Tanggal'
-    
-    new_row = pd.DataFrame({
-        'Tanggal': [tanggal_debet], 
-        'Debet': [debet], 
-        tanggal_kredit_col: [tanggal_kredit], 
-        'Kredit': [kredit]
+    get_buku_besar_table(akun)
+    add_row(f'bukbes_{akun}', {
+        'Tanggal': tanggal_debet,
+        'Debet': debet,
+        'Tanggal.1': tanggal_kredit,
+        'Kredit': kredit
     })
-    df = pd.concat([df, new_row], ignore_index=True)
-    save_buku_besar_data(df, akun)
-    return df
 
 def edit_data(akun, index, tanggal_debet, debet, tanggal_kredit, kredit):
-    df = load_buku_besar_data(akun)
-    
-    
-    tanggal_kredit_col = 'Tanggal.1' if 'Tanggal.1' in df.columns else 'Tanggal'
-    
-    df.loc[index, 'Tanggal'] = tanggal_debet
-    df.loc[index, 'Debet'] = debet
-    df.loc[index, tanggal_kredit_col] = tanggal_kredit
-    df.loc[index, 'Kredit'] = kredit
-    save_buku_besar_data(df, akun)
-    return df
+    get_buku_besar_table(akun)
+    update_row(f'bukbes_{akun}', index, {
+        'Tanggal': tanggal_debet,
+        'Debet': debet,
+        'Tanggal.1': tanggal_kredit,
+        'Kredit': kredit
+    })
 
 def delete_data(akun, index):
-    df = load_buku_besar_data(akun)
-    df = df.drop(index)
-    df = df.reset_index(drop=True)
-    save_buku_besar_data(df, akun)
-    return df
-
-def get_bukubesar_accounts_ordered():
-
-    database_dir = get_bukubesar_dir()
-    
-    
-    ordered_accounts = [
-        'kas', 
-        'perlengkapan', 
-        'peralatan', 
-        'utangbank', 
-        'modal', 
-        'penjualan', 
-        'pembelian', 
-        'bebangaji', 
-        'bebanpengiriman', 
-        'bebanpemeliharaan', 
-        'bebansewa', 
-        'bebanbunga', 
-        'ikhtisarlabarugi'
-    ]
-    
-    
-    available_files = os.listdir(database_dir)
-    available_accounts = []
-    
-    
-    for account in ordered_accounts:
-        
-        if f'bukbes_{account}.csv' in available_files:
-            available_accounts.append(account)
-        
-        elif f'bukbes.{account}.csv' in available_files:
-            available_accounts.append(account)
-    
-    
-    for filename in available_files:
-        if filename.endswith('.csv'):
-            account = get_account_name_from_filename(filename)
-            if account not in available_accounts:
-                available_accounts.append(account)
-    
-    return available_accounts
-
-def format_account_name(account_name):
-
-    
-    formatted = account_name.replace('_', ' ')
-    
-    
-    if formatted.startswith('beban'):
-        
-        beban_mapping = {
-            'bebangaji': 'Beban Gaji',
-            'bebanpengiriman': 'Beban Pengiriman',
-            'bebanpemeliharaan': 'Beban Pemeliharaan',
-            'bebansewa': 'Beban Sewa',
-            'bebanbunga': 'Beban Bunga'
-        }
-        
-        if account_name in beban_mapping:
-            return beban_mapping[account_name]
-        else:
-            
-            parts = formatted.split(' ', 1)
-            if len(parts) > 1:
-                return f"Beban {parts[1].capitalize()}"
-            else:
-                return "Beban"
-    
-    elif formatted == 'utangbank':
-        return "Utang Bank"
-    
-    elif formatted == 'ikhtisarlabarugi':
-        return "Ikhtisar Laba Rugi"
-    else:
-        
-        words = formatted.split()
-        formatted = ' '.join(word.capitalize() for word in words)
-    
-    return formatted
+    get_buku_besar_table(akun)
+    delete_row(f'bukbes_{akun}', index)
+
+def get_bukubesar_accounts():
+
+    posted = [akun for akun in get_ledgers() if get_akun(akun) is None]
+    return list_akun() + posted
+
+def write_buku_besar_files():
+
+    written = []
+    for account in get_bukubesar_accounts():
+        sheet = build_ledger_sheet(account)
+        if sheet.empty and not os.path.exists(os.path.join(get_bukubesar_dir(), get_filename_from_account(account))):
+            continue
+        save_buku_besar_data(sheet, account)
+        written.append(account)
+    return written
+
+def archive_buku_besar_files(periode):
+
+    # A closed period keeps its ledger sheets next to the live ones, under
+    # a folder named after the period. They are built from the period's
+    # frozen partition, so only a committed close can produce them.
+    posted = post_journal(load_period('jurnal_umum', periode))
+    ledgers = group_ledgers(posted)
+    saldo_awal = saldo_awal_of(load_period('neraca_saldo_periode_sebelumnya', periode))
+    awal = periode_awal(posted)
+
+    directory = os.path.join(get_bukubesar_dir(), periode)
+    ensure_dir(directory)
+    written = []
+    for account in list_akun() + [akun for akun in ledgers if get_akun(akun) is None]:
+        sheet = ledger_sheet(account, ledgers.get(account, pd.DataFrame(columns=LEDGER_COLUMNS)), saldo_awal, awal)
+        if sheet.empty:
+            continue
+        replace_file(os.path.join(directory, get_filename_from_account(account)), sheet.to_csv(index=False, date_format='%Y-%m-%d'))
+        written.append(account)
+    return written
 
 def show_buku_besar():
 
     st.subheader("Buku Besar")
     
     
-    accounts = get_bukubesar_accounts_ordered()
+    accounts = get_bukubesar_accounts()
     
     if not accounts:
-        st.warning("Tidak ada file buku besar yang ditemukan.")
+        st.warning("Belum ada akun yang diposting dari jurnal umum.")
         return
     
     
-    display_accounts = [format_account_name(account) for account in accounts]
+    display_accounts = [get_nama_akun(account) for account in accounts]
     account_dict = dict(zip(display_accounts, accounts))
     
     
+    # Widget state is dropped while another page is shown; the *_value keys
+    # keep the last choice and hand it back as the default.
+    terakhir = st.session_state.get('bukbes_akun_value')
     selected_display = st.selectbox(
         "Pilih Akun:",
-        options=display_accounts
+        options=display_accounts,
+        index=display_accounts.index(terakhir) if terakhir in display_accounts else 0,
+        key="bukbes_akun"
     )
+    st.session_state.bukbes_akun_value = selected_display
     
     
     selected_account = account_dict[selected_display]
     
     
-    if 'show_add_form_bukbes' not in st.session_state:
-        st.session_state.show_add_form_bukbes = False
-    if 'show_edit_form_bukbes' not in st.session_state:
-        st.session_state.show_edit_form_bukbes = False
-    if 'show_delete_form_bukbes' not in st.session_state:
-        st.session_state.show_delete_form_bukbes = False
-    if 'edit_index_bukbes' not in st.session_state:
-        st.session_state.edit_index_bukbes = 0
-    if 'delete_index_bukbes' not in st.session_state:
-        st.session_state.delete_index_bukbes = 0
-    
-    
     try:
         
-        df_bukbes = load_buku_besar_data(selected_account)
+        df_bukbes = build_ledger_sheet(selected_account)
         
         if not df_bukbes.empty:
             
             display_df = df_bukbes.copy()
             
             
-            
             currency_cols = ['Debet', 'Kredit']
             for col in currency_cols:
-                if col in display_df.columns:
-                    
-                    display_df[col] = pd.to_numeric(display_df[col], errors='coerce').fillna(0)
-                    
-                    display_df[col] = display_df[col].apply(lambda x: f"Rp {x:,.2f}".replace(',', '.'))
-            
+                display_df[col] = format_rupiah(display_df[col], blank_zero=True)
             
-            tanggal_kredit_col = 'Tanggal.1' if 'Tanggal.1' in display_df.columns else 'Tanggal'
-            
-            
-            column_mapping = {
+            display_df['Tanggal'] = format_tanggal(display_df['Tanggal'], dengan_tahun=False)
+            display_df['Tanggal.1'] = format_tanggal(display_df['Tanggal.1'], dengan_tahun=False)
+            display_df = display_df.fillna('').rename(columns={
                 'Tanggal': 'Tanggal Debet',
-                'Tanggal.1': 'Tanggal Kredit',
-                tanggal_kredit_col: 'Tanggal Kredit'
-            }
-            display_df = display_df.rename(columns=column_mapping)
+                'Tanggal.1': 'Tanggal Kredit'
+            })
             
             
             st.table(display_df)
             
             
-            database_dir = get_bukubesar_dir()
-            filename = get_filename_from_account(selected_account)
-            csv_path = os.path.join(database_dir, filename)
-            raw_df = pd.read_csv(csv_path)
-            
-            
-            if 'Debet' in raw_df.columns:
-                raw_df['Debet'] = pd.to_numeric(raw_df['Debet'], errors='coerce').fillna(0)
-            else:
-                raw_df['Debet'] = 0
-                
-            if 'Kredit' in raw_df.columns:
-                raw_df['Kredit'] = pd.to_numeric(raw_df['Kredit'], errors='coerce').fillna(0)
-            else:
-                raw_df['Kredit'] = 0
-            
-            total_debet = raw_df['Debet'].sum()
-            total_kredit = raw_df['Kredit'].sum()
+            total_debet = df_bukbes['Debet'].sum()
+            total_kredit = df_bukbes['Kredit'].sum()
             
             
-            if selected_account in ['kas', 'perlengkapan', 'peralatan']:
-                saldo_debit = total_debet - total_kredit
+            akun = get_akun(selected_account)
+            if akun:
+                if akun['Saldo Normal'] == 'debet':
+                    label_saldo, saldo = "Saldo Debit", total_debet - total_kredit
+                else:
+                    label_saldo, saldo = "Saldo Kredit", total_kredit - total_debet
                 
                 
                 col1, col2, col3 = st.columns(3)
                 with col1:
-                    st.metric("Total Debet", f"Rp {total_debet:,.2f}".replace(',', '.'))
+                    st.metric("Total Debet", rupiah(total_debet))
                 with col2:
-                    st.metric("Total Kredit", f"Rp {total_kredit:,.2f}".replace(',', '.'))
+                    st.metric("Total Kredit", rupiah(total_kredit))
                 with col3:
-                    st.metric("Saldo Debit", f"Rp {saldo_debit:,.2f}".replace(',', '.'))
+                    st.metric(label_saldo, rupiah(saldo))
             else:
                 
                 col1, col2 = st.columns(2)
                 with col1:
-                    st.metric("Total Debet", f"Rp {total_debet:,.2f}".replace(',', '.'))
+                    st.metric("Total Debet", rupiah(total_debet))
                 with col2:
-                    st.metric("Total Kredit", f"Rp {total_kredit:,.2f}".replace(',', '.'))
-                
-            
-            st.markdown("---")
+                    st.metric("Total Kredit", rupiah(total_kredit))
             
             
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                if st.button('➕ Tambah Data', key=f'add_bukbes_{selected_account}'):
-                    st.session_state.show_add_form_bukbes = not st.session_state.show_add_form_bukbes
-                    st.session_state.show_edit_form_bukbes = False
-                    st.session_state.show_delete_form_bukbes = False
-            with col2:
-                if st.button('✏️ Edit Data', key=f'edit_bukbes_{selected_account}'):
-                    st.session_state.show_edit_form_bukbes = not st.session_state.show_edit_form_bukbes
-                    st.session_state.show_add_form_bukbes = False
-                    st.session_state.show_delete_form_bukbes = False
-            with col3:
-                if st.button('🗑️ Hapus Data', key=f'delete_bukbes_{selected_account}'):
-                    st.session_state.show_delete_form_bukbes = not st.session_state.show_delete_form_bukbes
-                    st.session_state.show_add_form_bukbes = False
-                    st.session_state.show_edit_form_bukbes = False
-        else:
+            df_saldo = build_running_balance(selected_account)
+            with st.expander("Saldo Berjalan"):
+                saldo_df = df_saldo.copy()
+                saldo_df['Tanggal'] = format_tanggal(saldo_df['Tanggal'])
+                for col in ['Debet', 'Kredit']:
+                    saldo_df[col] = format_rupiah(saldo_df[col], blank_zero=True)
+                saldo_df['Saldo'] = format_rupiah(saldo_df['Saldo'])
+                st.table(saldo_df)
             
-            st.warning(f"Data buku besar untuk akun {selected_display} tidak tersedia atau kosong.")
-            st.info(f"Path file yang diharapkan: database/bukubesar/bukbes_{selected_account}.csv")
             
+            tanggal_akhir = get_ledger_last_date(selected_account)
+            tanggal = st.date_input("Saldo per tanggal", value=st.session_state.get('bukbes_asof_date_value', tanggal_akhir), key="bukbes_asof_date")
+            st.session_state.bukbes_asof_date_value = tanggal
+            st.metric(f"Saldo per {tanggal.strftime('%d/%m/%Y')}", rupiah(balance_as_of(selected_account, tanggal)))
+        else:
             
-            st.markdown("---")
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                if st.button('➕ Tambah Data', key=f'add_bukbes_empty_{selected_account}'):
-                    st.session_state.show_add_form_bukbes = not st.session_state.show_add_form_bukbes
-                    st.session_state.show_edit_form_bukbes = False
-                    st.session_state.show_delete_form_bukbes = False
-            with col2:
-                if st.button('✏️ Edit Data', key=f'edit_bukbes_empty_{selected_account}', disabled=True):
-                    pass
-            with col3:
-                if st.button('🗑️ Hapus Data', key=f'delete_bukbes_empty_{selected_account}', disabled=True):
-                    pass
+            st.warning(f"Belum ada transaksi jurnal umum untuk akun {selected_display}.")
     except Exception as e:
         st.error(f"Terjadi kesalahan: {e}")
-        st.info(f"Pastikan format file CSV sesuai (Tanggal, Debet, Tanggal, Kredit)")
-        
-        
-        st.markdown("---")
-        st.subheader("Menu Aksi")
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            if st.button('➕ Tambah Data', key=f'add_bukbes_error_{selected_account}'):
-                st.session_state.show_add_form_bukbes = not st.session_state.show_add_form_bukbes
-                st.session_state.show_edit_form_bukbes = False
-                st.session_state.show_delete_form_bukbes = False
-        with col2:
-            if st.button('✏️ Edit Data', key=f'edit_bukbes_error_{selected_account}', disabled=True):
-                pass
-        with col3:
-            if st.button('🗑️ Hapus Data', key=f'delete_bukbes_error_{selected_account}', disabled=True):
-                pass
+        st.info("Pastikan format file jurnal umum sesuai (Tanggal, Keterangan, Debet, Kredit)")
     
     
-    if st.session_state.show_add_form_bukbes:
-        with st.expander("Form Tambah Data", expanded=True):
-            st.subheader("Tambah Data Baru")
-            with st.form("add_form_bukbes"):
-                tanggal_debet = st.text_input("Tanggal Debet")
-                debet = st.number_input("Debet", min_value=0.0, format="%f")
-                tanggal_kredit = st.text_input("Tanggal Kredit")
-                kredit = st.number_input("Kredit", min_value=0.0, format="%f")
-                
-                submitted = st.form_submit_button("Simpan")
-                if submitted:
-                    add_data(selected_account, tanggal_debet, debet, tanggal_kredit, kredit)
-                    st.success("Data berhasil ditambahkan!")
-                    st.session_state.show_add_form_bukbes = False
-                    st.rerun()  
-    
-    
-    if st.session_state.show_edit_form_bukbes and 'df_bukbes' in locals():
-        with st.container():
-            st.markdown("---")
-            
-            options = [f"{i} - Baris {i+1}" for i in range(len(df_bukbes))]
-            if options:
-                selected_option = st.selectbox("Pilih data yang akan diedit:", options, key=f'edit_select_bukbes_{selected_account}')
-                index = int(selected_option.split(" - ")[0])
-                st.session_state.edit_index_bukbes = index
-                
-                with st.form("edit_form_bukbes"):
-                    tanggal_debet = st.text_input("Tanggal Debet", value=df_bukbes.loc[index, 'Tanggal'] if pd.notna(df_bukbes.loc[index, 'Tanggal']) else "")
-                    
-                    current_debet = pd.to_numeric(df_bukbes.loc[index, 'Debet'], errors='coerce') or 0.0
-                    debet = st.number_input("Debet", min_value=0.0, value=float(current_debet), format="%f")
-                    
-                    tanggal_kredit_col = 'Tanggal.1' if 'Tanggal.1' in df_bukbes.columns else 'Tanggal'
-                    tanggal_kredit = st.text_input("Tanggal Kredit", value=df_bukbes.loc[index, tanggal_kredit_col] if pd.notna(df_bukbes.loc[index, tanggal_kredit_col]) else "")
-                    
-                    current_kredit = pd.to_numeric(df_bukbes.loc[index, 'Kredit'], errors='coerce') or 0.0
-                    kredit = st.number_input("Kredit", min_value=0.0, value=float(current_kredit), format="%f")
-                    
-                    submitted = st.form_submit_button("Perbarui")
-                    if submitted:
-                        edit_data(selected_account, index, tanggal_debet, debet, tanggal_kredit, kredit)
-                        st.success("Data berhasil diperbarui!")
-                        st.session_state.show_edit_form_bukbes = False
-                        st.rerun()  
-            else:
-                st.warning("Tidak ada data yang dapat diedit.")
-    
-    
-    if st.session_state.show_delete_form_bukbes and 'df_bukbes' in locals():
-        with st.container():
-            st.markdown("---")
-            
-            options = [f"{i} - Baris {i+1}" for i in range(len(df_bukbes))]
-            if options:
-                selected_option = st.selectbox("Pilih data yang akan dihapus:", options, key=f'delete_select_bukbes_{selected_account}')
-                index = int(selected_option.split(" - ")[0])
-                st.session_state.delete_index_bukbes = index
-                
-                
-                if st.button("Hapus", key=f'confirm_delete_bukbes_{selected_account}'):
-                    delete_data(selected_account, index)
-                    st.success("Data berhasil dihapus!")
-                    st.session_state.show_delete_form_bukbes = False
-                    st.rerun()  
-            else:
-                st.warning("Tidak ada data yang dapat dihapus.")
\ No newline at end of file
+    st.markdown("---")
+    st.caption("Buku besar diposting otomatis dari jurnal umum. Ubah transaksi melalui menu Jurnal Umum.")
+    if st.button('💾 Simpan ke File Buku Besar', key="bukbes_write_btn"):
+        written = write_buku_besar_files()
+        st.success(f"{len(written)} file buku besar berhasil diperbarui dari jurnal umum.")
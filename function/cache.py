@@ -0,0 +1,101 @@
+import os
+import hashlib
+import threading
+import pandas as pd
+from collections import OrderedDict
+
+
+CACHE_MAX_BYTES = int(os.environ.get('KRICKETFLOW_CACHE_MB', '64')) * 1024 * 1024
+
+_entries = OrderedDict()
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+_total_bytes = 0
+
+
+def file_signature(path):
+
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return (path, None, None)
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+def frame_size(df):
+
+    try:
+        return int(df.memory_usage(index=True, deep=True).sum())
+    except Exception:
+        return 0
+
+def _drop(key):
+
+    global _total_bytes
+    entry = _entries.pop(key, None)
+    if entry is not None:
+        _total_bytes -= entry['bytes']
+    return entry
+
+def _evict():
+
+    while _total_bytes > CACHE_MAX_BYTES and len(_entries) > 1:
+        oldest = next(iter(_entries))
+        _drop(oldest)
+        _stats['evictions'] += 1
+
+def get_cached(key, signature, loader):
+
+    global _total_bytes
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry['signature'] == signature:
+            _entries.move_to_end(key)
+            _stats['hits'] += 1
+            return entry['df'].copy()
+        _stats['misses'] += 1
+
+    df = loader()
+
+    with _lock:
+        _drop(key)
+        size = frame_size(df)
+        if size <= CACHE_MAX_BYTES:
+            _entries[key] = {'signature': signature, 'df': df, 'bytes': size}
+            _total_bytes += size
+            _evict()
+    return df.copy()
+
+def get_frame(key, paths, loader):
+
+    return get_cached(key, tuple(file_signature(path) for path in paths), loader)
+
+def frame_hash(df):
+
+    # The row hashes include the index and are digested in order, so moving
+    # an amount from one account to another, or reordering rows, changes it.
+    if df.empty:
+        return 0
+    rows = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    return int.from_bytes(hashlib.blake2b(rows.tobytes(), digest_size=8).digest(), 'little')
+
+def invalidate(key=None):
+
+    global _total_bytes
+    with _lock:
+        if key is None:
+            _stats['invalidations'] += len(_entries)
+            _entries.clear()
+            _total_bytes = 0
+        elif _drop(key) is not None:
+            _stats['invalidations'] += 1
+
+def cache_stats():
+
+    with _lock:
+        return dict(_stats, entries=len(_entries), bytes=_total_bytes, max_bytes=CACHE_MAX_BYTES)
+
+def reset_stats():
+
+    with _lock:
+        for name in _stats:
+            _stats[name] = 0
@@ -0,0 +1,177 @@
+import os
+import stat
+import tempfile
+import threading
+
+
+FSYNC = os.environ.get('KRICKETFLOW_FSYNC', '1') != '0'
+
+# Read once at import: os.umask can only be read by setting it, which is
+# not safe once other threads create files.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def fsync_dir(directory):
+
+    # The rename itself only survives a crash once the directory entry is on disk.
+    if not FSYNC or os.name == 'nt':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def file_mode(path):
+
+    # A replaced file keeps its permissions; a new one gets what open()
+    # would have given it, not mkstemp's private 0600.
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+def replace_file(path, text):
+
+    # Readers and a crash see either the old file or the new one, never a
+    # truncated mix.
+    directory = os.path.dirname(path) or '.'
+    mode = file_mode(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        os.chmod(tmp_path, mode)
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            if FSYNC:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    fsync_dir(directory)
+
+def trim_torn_tail(path):
+
+    # A record cut short by a crash has no line ending. It never committed,
+    # so it is cut off before anything is appended behind it; otherwise the
+    # next record would be glued onto the fragment.
+    try:
+        with open(path, 'rb+') as f:
+            data = f.read()
+            end = data.rfind(b'\n') + 1
+            if end == len(data):
+                return False
+            f.truncate(end)
+            f.flush()
+            if FSYNC:
+                os.fsync(f.fileno())
+    except FileNotFoundError:
+        return False
+    return True
+
+def append_file(path, text):
+
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        if FSYNC:
+            os.fsync(f.fileno())
+
+
+class GroupCommit:
+
+    # Appends are queued per file and flushed by one committer thread.
+    # While it is busy syncing a batch, records from other sessions pile up
+    # and go out together in the next one: one write and one fsync per file
+    # per batch instead of one per record. Every caller blocks until its own
+    # records are durable.
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.pending = {}
+        self.waiters = []
+        self.thread = None
+        self.batches = 0
+        self.writes = 0
+
+    def submit(self, path, text):
+        # Returns a function that blocks until the write is durable, so a
+        # caller can fix the order of its write under a lock and wait for
+        # the disk after releasing it.
+        done = threading.Event()
+        result = {}
+        with self.cond:
+            self.pending.setdefault(path, []).append(text)
+            self.waiters.append((path, done, result))
+            self.writes += 1
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name='group-commit', daemon=True)
+                self.thread.start()
+            self.cond.notify()
+
+        def wait():
+            done.wait()
+            if 'error' in result:
+                raise result['error']
+        return wait
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.pending:
+                    self.cond.wait()
+                batch, self.pending = self.pending, {}
+                waiters, self.waiters = self.waiters, []
+                self.batches += 1
+
+            errors = self.commit(batch)
+            for path, done, result in waiters:
+                if path in errors:
+                    result['error'] = errors[path]
+                done.set()
+
+    def commit(self, batch):
+        errors = {}
+        directories = set()
+        for path, texts in batch.items():
+            try:
+                # Only a newly created file changes the directory.
+                if not os.path.exists(path):
+                    directories.add(os.path.dirname(path) or '.')
+                text = ''.join(texts)
+                if text:
+                    append_file(path, text)
+            except Exception as e:
+                errors[path] = e
+        for directory in directories:
+            try:
+                fsync_dir(directory)
+            except OSError:
+                pass
+        return errors
+
+    def stats(self):
+        with self.cond:
+            return {'writes': self.writes, 'batches': self.batches}
+
+
+_commits = GroupCommit()
+
+
+def append_text(path, text, wait=True):
+
+    done = _commits.submit(path, text)
+    return done() if wait else done
+
+def flush_path(path):
+
+    # An empty append is queued behind everything already pending for the
+    # path, so once it returns those records are on disk.
+    _commits.submit(path, '')()
+
+def commit_stats():
+
+    return _commits.stats()
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+
+def rupiah_layout(digits):
+
+    # Byte offsets of every digit in "d.ddd.ddd,dd"; the thousands separators
+    # and the decimal comma sit at fixed positions in between.
+    digit_pos = np.array([i + (i + (3 - digits % 3) % 3) // 3 for i in range(digits)])
+    width = int(digit_pos[-1]) + 1
+    return digit_pos, width
+
+
+def to_money(values):
+
+    # Amounts are whole rupiah held as int64, so sums and debit = credit
+    # checks are exact; blanks and unparseable cells count as 0.
+    amounts = pd.to_numeric(values, errors='coerce')
+    if isinstance(amounts, pd.Series):
+        if pd.api.types.is_integer_dtype(amounts) and not amounts.hasnans:
+            return amounts.astype('int64')
+        return amounts.fillna(0).round().astype('int64')
+    return 0 if pd.isna(amounts) else int(round(float(amounts)))
+
+def format_rupiah(values, blank_zero=False):
+
+    is_series = isinstance(values, pd.Series)
+    amounts = pd.Series(values)
+    if pd.api.types.is_integer_dtype(amounts) and not amounts.hasnans:
+        amounts = amounts.to_numpy(dtype='int64')
+        sen = np.abs(amounts) * 100
+    else:
+        amounts = pd.to_numeric(amounts, errors='coerce').fillna(0).to_numpy(dtype='float64')
+        sen = np.rint(np.abs(amounts) * 100).astype(np.int64)
+    whole = sen // 100
+    fraction = sen % 100
+
+    digits = len(str(int(whole.max(initial=0))))
+    digit_pos, width = rupiah_layout(digits)
+
+    chars = np.full((len(sen), width + 3), ord('.'), dtype=np.uint8)
+    remaining = whole.copy()
+    for pos in digit_pos[::-1]:
+        remaining, digit = np.divmod(remaining, 10)
+        chars[:, pos] = digit
+    chars[:, digit_pos] += ord('0')
+    chars[:, width] = ord(',')
+    chars[:, width + 1] = fraction // 10 + ord('0')
+    chars[:, width + 2] = fraction % 10 + ord('0')
+
+    text = np.ascontiguousarray(chars).view(f'S{width + 3}').ravel()
+    text = np.char.lstrip(text, b'0.')
+    text = np.where(whole == 0, np.char.add(b'0', text), text)
+
+    prefix = np.where((amounts < 0) & (sen > 0), b'Rp -', b'Rp ')
+    result = np.char.add(prefix, text).astype(str)
+
+    if blank_zero:
+        result = np.where(sen == 0, '', result)
+
+    if is_series:
+        return pd.Series(result, index=values.index, dtype=object)
+    return result
+
+def rupiah(value):
+
+    return str(format_rupiah([value])[0])
@@ -3,307 +3,186 @@ from streamlit_option_menu import option_menu
 import pandas as pd
 import os
 import sys
+from function.formatting import format_rupiah, rupiah
+from function.tanggal import format_tanggal
+from function.pipeline import register_node, build
+from function.akun import akun_kelompok, missing_kelompok, kelompok_message
+import function.neraca_lajur
+from function.storage import load_table, save_table, add_row, update_row, delete_row
 
 
 def ensure_dir(directory):
     if not os.path.exists(directory):
         os.makedirs(directory)
 
+JURNAL_PENUTUP_COLUMNS = ['Tanggal', 'Keterangan', 'Debet', 'Kredit', 'Memo']
+KELOMPOK_PENUTUP = ['ikhtisar', 'ekuitas', 'prive']
+
+
 def load_jurnal_penutup_data():
 
-    
-    
-    current_file = os.path.abspath(__file__)
-    project_root = os.path.dirname(os.path.dirname(current_file))
-    database_dir = os.path.join(project_root, 'database')
-    ensure_dir(database_dir)
-    
-    csv_path = os.path.join(database_dir, 'jurnal_penutup.csv')
-    
-    
-    if os.path.exists(csv_path):
-        df = pd.read_csv(csv_path)
-        
-        
-        
-        if 'Keterangan ' in df.columns:
-            df = df.rename(columns={'Keterangan ': 'Keterangan'})
-            
-        
-        new_df = pd.DataFrame(columns=['Tanggal', 'Keterangan', 'Debet', 'Kredit'])
-        
-        
-        
-        for col in new_df.columns:
-            if col in df.columns:
-                new_df[col] = df[col]
-        
-        return new_df
-    else:
-        
-        return pd.DataFrame(columns=['Tanggal', 'Keterangan', 'Debet', 'Kredit'])
+    return load_table('jurnal_penutup')
 
 def save_jurnal_penutup_data(df):
 
-    current_file = os.path.abspath(__file__)
-    project_root = os.path.dirname(os.path.dirname(current_file))
-    database_dir = os.path.join(project_root, 'database')
-    ensure_dir(database_dir)
-    
-    csv_path = os.path.join(database_dir, 'jurnal_penutup.csv')
-    
-    
-    save_df = pd.DataFrame(columns=['Tanggal', 'Keterangan', 'Debet', 'Kredit'])
-    
-    
-    for col in save_df.columns:
-        if col in df.columns:
-            save_df[col] = df[col]
-    
-    
-    save_df.to_csv(csv_path, index=False)
+    save_table('jurnal_penutup', df)
 
 
-def add_data(tanggal, keterangan, debet, kredit):
-    df = load_jurnal_penutup_data()
-    new_row = pd.DataFrame({'Tanggal': [tanggal], 'Keterangan': [keterangan], 'Debet': [debet], 'Kredit': [kredit]})
-    df = pd.concat([df, new_row], ignore_index=True)
-    save_jurnal_penutup_data(df)
-    return df
+def add_data(tanggal, keterangan, debet, kredit, memo=''):
+    add_row('jurnal_penutup', {'Tanggal': tanggal, 'Keterangan': keterangan, 'Debet': debet, 'Kredit': kredit, 'Memo': memo})
 
 
-def edit_data(index, tanggal, keterangan, debet, kredit):
-    df = load_jurnal_penutup_data()
-    df.loc[index, 'Tanggal'] = tanggal
-    df.loc[index, 'Keterangan'] = keterangan
-    df.loc[index, 'Debet'] = debet
-    df.loc[index, 'Kredit'] = kredit
-    save_jurnal_penutup_data(df)
-    return df
+def edit_data(index, tanggal, keterangan, debet, kredit, memo=''):
+    update_row('jurnal_penutup', index, {'Tanggal': tanggal, 'Keterangan': keterangan, 'Debet': debet, 'Kredit': kredit, 'Memo': memo})
 
 
 def delete_data(index):
-    df = load_jurnal_penutup_data()
-    df = df.drop(index)
-    df = df.reset_index(drop=True)
-    save_jurnal_penutup_data(df)
-    return df
+    delete_row('jurnal_penutup', index)
+
+def closing_entry(tanggal, lines, memo):
+
+    lines = lines[(lines['Debet'] != 0) | (lines['Kredit'] != 0)].reset_index(drop=True)
+    if lines.empty:
+        return lines
+    lines['Tanggal'] = pd.NaT
+    lines['Memo'] = None
+    lines.loc[0, ['Tanggal', 'Memo']] = [tanggal, memo]
+    return lines
+
+def close_accounts(akun_rows, ikhtisar, memo, tanggal, ikhtisar_first):
+
+    # Each nominal account is closed by posting its Laba Rugi balance on the
+    # opposite side; Ikhtisar laba rugi takes the net of the whole group.
+    accounts = pd.DataFrame({
+        'Akun': akun_rows['Akun'].to_numpy(),
+        'Keterangan': akun_rows['Nama Akun'].to_numpy(),
+        'Debet': akun_rows['Laba Rugi Kredit'].to_numpy(),
+        'Kredit': akun_rows['Laba Rugi Debet'].to_numpy()
+    })
+    net = accounts['Kredit'].sum() - accounts['Debet'].sum()
+    ikhtisar = pd.DataFrame({
+        'Akun': [ikhtisar.name],
+        'Keterangan': [ikhtisar['Nama Akun']],
+        'Debet': [max(net, 0)],
+        'Kredit': [max(-net, 0)]
+    })
+    lines = [ikhtisar, accounts] if ikhtisar_first else [accounts, ikhtisar]
+    return closing_entry(tanggal, pd.concat(lines, ignore_index=True), memo)
+
+def missing_closing_accounts(akun_df):
+
+    return missing_kelompok(akun_df, KELOMPOK_PENUTUP)
+
+def closing_accounts_message(missing):
+
+    return kelompok_message(missing) + " Jurnal penutup membutuhkan akun ikhtisar laba rugi, modal, dan prive."
+
+def compute_jurnal_penutup(df_lajur, tanggal, akun_df):
+
+    missing = missing_closing_accounts(akun_df)
+    if missing:
+        raise ValueError(closing_accounts_message(missing))
+
+    # Nominal accounts close into the first ikhtisar account and that one,
+    # like every prive account, into the first ekuitas account.
+    ikhtisar_akun = akun_df.loc[akun_kelompok(akun_df, 'ikhtisar')[0]]
+    modal_akun = akun_df.loc[akun_kelompok(akun_df, 'ekuitas')[0]]
+    df_lajur = df_lajur[df_lajur['Akun'].isin(akun_df.index)]
+    tipe = akun_df['Tipe'].reindex(df_lajur['Akun']).to_numpy()
+    
+    
+    pendapatan = close_accounts(df_lajur[tipe == 'pendapatan'], ikhtisar_akun, 'Menutup akun pendapatan', tanggal, ikhtisar_first=False)
+    beban = close_accounts(df_lajur[tipe == 'beban'], ikhtisar_akun, 'Menutup akun beban', tanggal, ikhtisar_first=True)
+    
+    
+    laba_bersih = (df_lajur['Laba Rugi Kredit'] - df_lajur['Laba Rugi Debet']).sum()
+    urutan = [ikhtisar_akun, modal_akun] if laba_bersih >= 0 else [modal_akun, ikhtisar_akun]
+    ikhtisar = closing_entry(tanggal, pd.DataFrame({
+        'Akun': [akun.name for akun in urutan],
+        'Keterangan': [akun['Nama Akun'] for akun in urutan],
+        'Debet': [abs(laba_bersih), 0],
+        'Kredit': [0, abs(laba_bersih)]
+    }), 'Menutup akun Ikhtisar laba rugi')
+    
+    
+    # Every prive account is closed on its own; modal takes their net.
+    prive_rows = df_lajur[akun_df['Kelompok'].reindex(df_lajur['Akun']).to_numpy() == 'prive']
+    saldo = (prive_rows['Neraca Debet'] - prive_rows['Neraca Kredit']).to_numpy()
+    prive = saldo.sum()
+    prive_lines = pd.DataFrame({
+        'Akun': prive_rows['Akun'].to_numpy(),
+        'Keterangan': prive_rows['Nama Akun'].to_numpy(),
+        'Debet': (-saldo).clip(min=0),
+        'Kredit': saldo.clip(min=0)
+    })
+    modal_line = pd.DataFrame({
+        'Akun': [modal_akun.name],
+        'Keterangan': [modal_akun['Nama Akun']],
+        'Debet': [max(prive, 0)],
+        'Kredit': [max(-prive, 0)]
+    })
+    lines = [modal_line, prive_lines] if prive >= 0 else [prive_lines, modal_line]
+    penarikan = closing_entry(tanggal, pd.concat(lines, ignore_index=True), 'Menutup akun prive')
+    
+    
+    df = pd.concat([pendapatan, beban, ikhtisar, penarikan], ignore_index=True)
+    return df.reindex(columns=['Akun'] + JURNAL_PENUTUP_COLUMNS)
+
+def generate_jurnal_penutup():
+
+    return build('jurnal_penutup')
 
 def show_jurnal_penutup():
 
     st.subheader("Jurnal Penutup")
-    
-    
-    if 'show_add_form_jp' not in st.session_state:
-        st.session_state.show_add_form_jp = False
-    if 'show_edit_form_jp' not in st.session_state:
-        st.session_state.show_edit_form_jp = False
-    if 'show_delete_form_jp' not in st.session_state:
-        st.session_state.show_delete_form_jp = False
-    if 'edit_index_jp' not in st.session_state:
-        st.session_state.edit_index_jp = 0
-    if 'delete_index_jp' not in st.session_state:
-        st.session_state.delete_index_jp = 0
+
+
+    missing = missing_closing_accounts(build('akun'))
+    if missing:
+        st.error(closing_accounts_message(missing))
+        return
     
     
     try:
         
-        df_jurnal = load_jurnal_penutup_data()
+        df_jurnal = generate_jurnal_penutup()
         
         if not df_jurnal.empty:
             
-            display_df = df_jurnal.copy()
-            
+            display_df = df_jurnal[JURNAL_PENUTUP_COLUMNS].copy()
+            display_df['Tanggal'] = format_tanggal(display_df['Tanggal'])
+            display_df = display_df.fillna('')
             
             
             currency_cols = ['Debet', 'Kredit']
             for col in currency_cols:
-                
-                display_df[col] = pd.to_numeric(display_df[col], errors='coerce').fillna(0)
-                
-                display_df[col] = display_df[col].apply(lambda x: f"Rp {x:,.2f}".replace(',', '.'))
+                display_df[col] = format_rupiah(df_jurnal[col], blank_zero=True)
             
             
             st.table(display_df)
             
             
-            
-            numeric_df = df_jurnal.copy()
-            numeric_df['Debet'] = pd.to_numeric(numeric_df['Debet'], errors='coerce').fillna(0)
-            numeric_df['Kredit'] = pd.to_numeric(numeric_df['Kredit'], errors='coerce').fillna(0)
-            
-            total_debet = numeric_df['Debet'].sum()
-            total_kredit = numeric_df['Kredit'].sum()
+            total_debet = df_jurnal['Debet'].sum()
+            total_kredit = df_jurnal['Kredit'].sum()
             
             
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Total Debet", f"Rp {total_debet:,.2f}".replace(',', '.'))
-            with col2:
-                st.metric("Total Kredit", f"Rp {total_kredit:,.2f}".replace(',', '.'))
-                
-            
-            st.markdown("---")
-            
-            
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                if st.button('➕ Tambah Data', key="jp_add_btn"):
-                    st.session_state.show_add_form_jp = not st.session_state.show_add_form_jp
-                    st.session_state.show_edit_form_jp = False
-                    st.session_state.show_delete_form_jp = False
+                st.metric("Total Debet", rupiah(total_debet))
             with col2:
-                if st.button('✏️ Edit Data', key="jp_edit_btn"):
-                    st.session_state.show_edit_form_jp = not st.session_state.show_edit_form_jp
-                    st.session_state.show_add_form_jp = False
-                    st.session_state.show_delete_form_jp = False
-            with col3:
-                if st.button('🗑️ Hapus Data', key="jp_delete_btn"):
-                    st.session_state.show_delete_form_jp = not st.session_state.show_delete_form_jp
-                    st.session_state.show_add_form_jp = False
-                    st.session_state.show_edit_form_jp = False
+                st.metric("Total Kredit", rupiah(total_kredit))
         else:
-            
-            st.warning("Data jurnal penutup tidak tersedia. Silakan gunakan tombol 'Tambah Data' untuk menambahkan data baru.")
-            st.info("Path file yang diharapkan: database/jurnal_penutup.csv")
-            
-            
-            st.markdown("---")
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                if st.button('➕ Tambah Data', key="jp_add_btn_empty"):
-                    st.session_state.show_add_form_jp = not st.session_state.show_add_form_jp
-                    st.session_state.show_edit_form_jp = False
-                    st.session_state.show_delete_form_jp = False
-            with col2:
-                if st.button('✏️ Edit Data', key="jp_edit_btn_empty", disabled=True):
-                    pass
-            with col3:
-                if st.button('🗑️ Hapus Data', key="jp_delete_btn_empty", disabled=True):
-                    pass
+            st.warning("Belum ada akun pendapatan atau beban yang perlu ditutup.")
     except Exception as e:
         st.error(f"Terjadi kesalahan: {e}")
-        st.info("Pastikan format file CSV sesuai (Tanggal, Keterangan, Debet, Kredit)")
-        
-        
-        st.markdown("---")
-        st.subheader("Menu Aksi")
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            if st.button('➕ Tambah Data', key="jp_add_btn_error"):
-                st.session_state.show_add_form_jp = not st.session_state.show_add_form_jp
-                st.session_state.show_edit_form_jp = False
-                st.session_state.show_delete_form_jp = False
-        with col2:
-            if st.button('✏️ Edit Data', key="jp_edit_btn_error", disabled=True):
-                pass
-        with col3:
-            if st.button('🗑️ Hapus Data', key="jp_delete_btn_error", disabled=True):
-                pass
+        st.info("Pastikan neraca lajur dapat disusun dari jurnal umum dan neraca saldo periode sebelumnya")
     
     
-    if st.session_state.show_add_form_jp:
-        with st.expander("Form Tambah Data", expanded=True):
-            st.subheader("Tambah Data Baru")
-            with st.form("add_form_jp"):
-                tanggal = st.date_input("Tanggal")
-                keterangan = st.text_input("Keterangan")
-                debet = st.number_input("Debet", min_value=0.0, format="%f")
-                kredit = st.number_input("Kredit", min_value=0.0, format="%f")
-                
-                submitted = st.form_submit_button("Simpan")
-                if submitted:
-                    add_data(tanggal.strftime('%m/%d/%Y'), keterangan, debet, kredit)
-                    st.success("Data berhasil ditambahkan!")
-                    st.session_state.show_add_form_jp = False
-                    st.rerun()  
-    
-    
-    if st.session_state.show_edit_form_jp and 'df_jurnal' in locals():
-        with st.container():
-            st.markdown("---")
-            
-            options = []
-            for i, row in df_jurnal.iterrows():
-                if pd.notna(row['Keterangan']) and row['Keterangan'] != "":
-                    options.append(f"{i} - {row['Keterangan']}")
-                elif pd.notna(row['Tanggal']) and row['Tanggal'] != "":
-                    options.append(f"{i} - {row['Tanggal']}")
-                else:
-                    options.append(f"{i} - Item {i}")
-                    
-            if options:
-                selected_option = st.selectbox("Pilih data yang akan diedit:", options, key="jp_edit_select")
-                index = int(selected_option.split(" - ")[0])
-                st.session_state.edit_index_jp = index
-                
-                with st.form("edit_form_jp"):
-                    
-                    
-                    date_str = df_jurnal.loc[index, 'Tanggal']
-                    try:
-                        
-                        from datetime import datetime
-                        if isinstance(date_str, str) and date_str.strip():
-                            
-                            try:
-                                date_obj = datetime.strptime(date_str, '%m/%d/%Y')
-                            except ValueError:
-                                try:
-                                    date_obj = datetime.strptime(date_str, '%d/%m/%Y')
-                                except ValueError:
-                                    date_obj = datetime.now()
-                        else:
-                            date_obj = datetime.now()  
-                    except:
-                        date_obj = datetime.now()  
-                        
-                    tanggal = st.date_input("Tanggal", value=date_obj)
-                    
-                    
-                    keterangan_value = df_jurnal.loc[index, 'Keterangan'] if pd.notna(df_jurnal.loc[index, 'Keterangan']) else ""
-                    keterangan = st.text_input("Keterangan", value=keterangan_value)
-                    
-                    
-                    current_debet = pd.to_numeric(df_jurnal.loc[index, 'Debet'], errors='coerce') or 0.0
-                    current_kredit = pd.to_numeric(df_jurnal.loc[index, 'Kredit'], errors='coerce') or 0.0
-                    
-                    debet = st.number_input("Debet", min_value=0.0, value=float(current_debet), format="%f")
-                    kredit = st.number_input("Kredit", min_value=0.0, value=float(current_kredit), format="%f")
-                    
-                    submitted = st.form_submit_button("Perbarui")
-                    if submitted:
-                        edit_data(index, tanggal.strftime('%m/%d/%Y'), keterangan, debet, kredit)
-                        st.success("Data berhasil diperbarui!")
-                        st.session_state.show_edit_form_jp = False
-                        st.rerun()  
-            else:
-                st.warning("Tidak ada data yang dapat diedit.")
-    
-    
-    if st.session_state.show_delete_form_jp and 'df_jurnal' in locals():
-        with st.container():
-            st.markdown("---")
-            
-            options = []
-            for i, row in df_jurnal.iterrows():
-                if pd.notna(row['Keterangan']) and row['Keterangan'] != "":
-                    options.append(f"{i} - {row['Keterangan']}")
-                elif pd.notna(row['Tanggal']) and row['Tanggal'] != "":
-                    options.append(f"{i} - {row['Tanggal']}")
-                else:
-                    options.append(f"{i} - Item {i}")
-                    
-            if options:
-                selected_option = st.selectbox("Pilih data yang akan dihapus:", options, key="jp_delete_select")
-                index = int(selected_option.split(" - ")[0])
-                st.session_state.delete_index_jp = index
-                
-                
-                if st.button("Hapus", key="jp_delete_confirm"):
-                    delete_data(index)
-                    st.success("Data berhasil dihapus!")
-                    st.session_state.show_delete_form_jp = False
-                    st.rerun()  
-            else:
-                st.warning("Tidak ada data yang dapat dihapus.")
\ No newline at end of file
+    st.markdown("---")
+    st.caption("Jurnal penutup disusun otomatis dari kolom Laba Rugi pada neraca lajur.")
+    if st.button('💾 Simpan ke File Jurnal Penutup', key="jp_write_btn"):
+        save_jurnal_penutup_data(generate_jurnal_penutup()[JURNAL_PENUTUP_COLUMNS])
+        st.success("File jurnal penutup berhasil diperbarui.")
+
+
+register_node('jurnal_penutup', ['neraca_lajur', 'tanggal_akhir', 'akun'], compute_jurnal_penutup)
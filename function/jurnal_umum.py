@@ -1,8 +1,15 @@
 import streamlit as st
 from streamlit_option_menu import option_menu
 import pandas as pd
+import numpy as np
 import os
 import sys
+from function.formatting import format_rupiah, rupiah, to_money
+from function.tanggal import format_tanggal, format_periode
+from function.akun import get_akun_options
+from function.storage import load_table, save_table, add_rows, update_table, row_position, compact_table, load_period, table_manifest
+from function.partitions import closed_period_of
+from function.validasi_jurnal import validate_entry, get_journal_check
 
 
 def ensure_dir(directory):
@@ -11,73 +18,184 @@ def ensure_dir(directory):
 
 def load_jurnal_umum_data():
 
-    
-    
-    current_file = os.path.abspath(__file__)
-    project_root = os.path.dirname(os.path.dirname(current_file))
-    database_dir = os.path.join(project_root, 'database')
-    ensure_dir(database_dir)
-    
-    csv_path = os.path.join(database_dir, 'jurnal_umum.csv')
-    
-    
-    if os.path.exists(csv_path):
-        return pd.read_csv(csv_path)
-    else:
-        
-        return pd.DataFrame(columns=['Tanggal', 'Keterangan', 'Debet', 'Kredit'])
+    return load_table('jurnal_umum')
 
-def save_jurnal_umum_data(df):
+def save_jurnal_umum_data(df, expected=None):
 
-    current_file = os.path.abspath(__file__)
-    project_root = os.path.dirname(os.path.dirname(current_file))
-    database_dir = os.path.join(project_root, 'database')
-    ensure_dir(database_dir)
-    
-    csv_path = os.path.join(database_dir, 'jurnal_umum.csv')
-    df.to_csv(csv_path, index=False)
+    save_table('jurnal_umum', df, expected=expected)
+
+def compact_jurnal_umum():
+
+    compact_table('jurnal_umum')
+
+def get_jurnal_manifest():
+
+    return table_manifest('jurnal_umum')
+
+def load_jurnal_periode(periode):
+
+    return load_period('jurnal_umum', periode)
+
+def closed_period_errors(tanggal):
+
+    # Dates before the open period belong to a closed period or to none at
+    # all; either way they cannot be posted.
+    manifest = get_jurnal_manifest()
+    periode = closed_period_of(manifest, tanggal)
+    if periode:
+        return [f"Periode {format_periode(periode)} sudah ditutup; transaksinya tidak dapat diubah lagi."]
+    mulai = pd.Timestamp(manifest['periode'][manifest['aktif']]['mulai'])
+    if tanggal is not None and pd.notna(tanggal) and pd.Timestamp(tanggal) < mulai:
+        return [f"Tanggal transaksi sebelum awal periode aktif ({format_tanggal([mulai]).iloc[0]})."]
+    return []
+
+
+def add_jurnal_entry(tanggal, lines):
+
+    # The whole entry is validated first and then written in one go; the
+    # date goes on the first line only, as in the rest of the journal.
+    lines = lines.rename(columns={'Akun': 'Keterangan'})
+    lines = lines[lines['Keterangan'].notna() | (to_money(lines['Debet']) != 0) | (to_money(lines['Kredit']) != 0)]
+    errors = closed_period_errors(tanggal) + validate_entry(lines)
+    if errors:
+        return errors
+
+    rows = [
+        {'Tanggal': tanggal if i == 0 else None, 'Keterangan': keterangan, 'Debet': debet, 'Kredit': kredit}
+        for i, (keterangan, debet, kredit) in enumerate(zip(lines['Keterangan'], lines['Debet'], lines['Kredit']))
+    ]
+    add_rows('jurnal_umum', rows)
+    return []
+
+
+def entry_rows(jurnal_df, positions):
+
+    # Positions of every line in the entries the given lines belong to; an
+    # entry runs from a dated line down to the line before the next one.
+    entri = jurnal_df['Tanggal'].notna().cumsum().to_numpy()
+    return np.flatnonzero(np.isin(entri, entri[list(positions)]))
+
+def entry_errors(jurnal_df, positions):
+
+    # Each entry the change touches is checked as a whole, the way a new
+    # entry is checked before it is written.
+    entri = jurnal_df['Tanggal'].notna().cumsum().to_numpy()
+    errors = []
+    for nomor in pd.unique(entri[list(positions)]):
+        errors += validate_entry(jurnal_df[entri == nomor])
+    return errors
+
+
+class EntriTidakValid(Exception):
+    pass
 
 
-def add_jurnal_data(tanggal, keterangan, debet, kredit):
-    df = load_jurnal_umum_data()
-    new_row = pd.DataFrame({'Tanggal': [tanggal], 'Keterangan': [keterangan], 'Debet': [debet], 'Kredit': [kredit]})
-    df = pd.concat([df, new_row], ignore_index=True)
-    save_jurnal_umum_data(df)
-    return df
+def edit_jurnal_data(row_id, tanggal, keterangan, debet, kredit):
+    errors = closed_period_errors(tanggal)
+    if errors:
+        return errors
+    row = {'Tanggal': tanggal, 'Keterangan': keterangan, 'Debet': debet, 'Kredit': kredit}
 
+    # The entry is checked on the same version of the table the change is
+    # saved over; if another session wrote meanwhile, both the check and
+    # the change run again on its result.
+    def change(df):
+        position = row_position('jurnal_umum', df, row_id)
+        touched = entry_rows(df, [position])
+        df.loc[position, list(row)] = [pd.Timestamp(tanggal) if tanggal else pd.NaT, keterangan, to_money(debet), to_money(kredit)]
+        errors = entry_errors(df, set(touched) | {position})
+        if errors:
+            raise EntriTidakValid(errors)
+        return df
+    try:
+        update_table('jurnal_umum', change)
+    except EntriTidakValid as e:
+        return e.args[0]
+    return []
+
+
+def delete_jurnal_data(row_id):
+
+    def change(df):
+        position = row_position('jurnal_umum', df, row_id)
+        rest = [i - (i > position) for i in entry_rows(df, [position]) if i != position]
+        df = df.drop(df.index[position]).reset_index(drop=True)
+        errors = entry_errors(df, rest) if rest else []
+        if errors:
+            raise EntriTidakValid(errors + ["Hapus seluruh entri jika transaksinya memang dibatalkan."])
+        return df
+    try:
+        update_table('jurnal_umum', change)
+    except EntriTidakValid as e:
+        return e.args[0]
+    return []
+
+
+def delete_jurnal_entry(row_id):
 
-def edit_jurnal_data(index, tanggal, keterangan, debet, kredit):
-    df = load_jurnal_umum_data()
-    df.loc[index, 'Tanggal'] = tanggal
-    df.loc[index, 'Keterangan'] = keterangan
-    df.loc[index, 'Debet'] = debet
-    df.loc[index, 'Kredit'] = kredit
-    save_jurnal_umum_data(df)
-    return df
+    def change(df):
+        rows = entry_rows(df, [row_position('jurnal_umum', df, row_id)])
+        return df.drop(df.index[rows]).reset_index(drop=True)
+    update_table('jurnal_umum', change)
 
+def show_jurnal_periode(periode):
 
-def delete_jurnal_data(index):
-    df = load_jurnal_umum_data()
-    df = df.drop(index)
-    df = df.reset_index(drop=True)
-    save_jurnal_umum_data(df)
-    return df
+    df_jurnal = load_jurnal_periode(periode)
+    st.info(f"Periode {format_periode(periode)} sudah ditutup dan hanya dapat dibaca.")
+    if df_jurnal.empty:
+        st.warning("Tidak ada transaksi pada periode ini.")
+        return
+
+    display_df = df_jurnal.drop(columns='ID')
+    display_df['Tanggal'] = format_tanggal(display_df['Tanggal'])
+    for col in ['Debet', 'Kredit']:
+        display_df[col] = format_rupiah(display_df[col])
+    st.table(display_df)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Total Debet", rupiah(df_jurnal['Debet'].sum()))
+    with col2:
+        st.metric("Total Kredit", rupiah(df_jurnal['Kredit'].sum()))
 
 def show_jurnal_umum():
 
     st.subheader("Jurnal Umum")
     
     
+    manifest = get_jurnal_manifest()
+    if len(manifest['periode']) > 1:
+        # Widget state is dropped while another page is shown; the *_value
+        # keys keep the last choice and hand it back as the default.
+        pilihan = sorted(manifest['periode'], reverse=True)
+        terakhir = st.session_state.get('jurnal_periode_value')
+        periode = st.selectbox(
+            "Periode",
+            pilihan,
+            index=pilihan.index(terakhir) if terakhir in pilihan else 0,
+            format_func=lambda p: format_periode(p) + (" (aktif)" if p == manifest['aktif'] else ""),
+            key="jurnal_periode"
+        )
+        st.session_state.jurnal_periode_value = periode
+        if periode != manifest['aktif']:
+            show_jurnal_periode(periode)
+            return
+    
+    
     if 'jurnal_show_add_form' not in st.session_state:
         st.session_state.jurnal_show_add_form = False
     if 'jurnal_show_edit_form' not in st.session_state:
         st.session_state.jurnal_show_edit_form = False
     if 'jurnal_show_delete_form' not in st.session_state:
         st.session_state.jurnal_show_delete_form = False
-    if 'jurnal_edit_index' not in st.session_state:
-        st.session_state.jurnal_edit_index = 0
-    if 'jurnal_delete_index' not in st.session_state:
-        st.session_state.jurnal_delete_index = 0
+    if 'jurnal_edit_id' not in st.session_state:
+        st.session_state.jurnal_edit_id = None
+    if 'jurnal_delete_id' not in st.session_state:
+        st.session_state.jurnal_delete_id = None
+    if 'jurnal_delete_entry_value' not in st.session_state:
+        st.session_state.jurnal_delete_entry_value = False
+    if 'jurnal_add_lines_value' not in st.session_state:
+        st.session_state.jurnal_add_lines_value = pd.DataFrame({'Akun': [None, None], 'Debet': [0, 0], 'Kredit': [0, 0]})
     
     
     try:
@@ -86,39 +204,40 @@ def show_jurnal_umum():
         
         if not df_jurnal.empty:
             
-            display_df = df_jurnal.copy()
-            
+            display_df = df_jurnal.drop(columns='ID')
+            display_df['Tanggal'] = format_tanggal(display_df['Tanggal'])
             
             
             currency_cols = ['Debet', 'Kredit']
             for col in currency_cols:
                 
-                display_df[col] = pd.to_numeric(display_df[col], errors='coerce').fillna(0)
-                
-                display_df[col] = display_df[col].apply(lambda x: f"Rp {x:,.2f}".replace(',', '.'))
+                display_df[col] = format_rupiah(display_df[col])
             
             
             st.table(display_df)
             
             
-            current_file = os.path.abspath(__file__)
-            project_root = os.path.dirname(os.path.dirname(current_file))
-            csv_path = os.path.join(project_root, 'database', 'jurnal_umum.csv')
-            raw_df = pd.read_csv(csv_path)
-            
-            
-            raw_df['Debet'] = pd.to_numeric(raw_df['Debet'], errors='coerce').fillna(0)
-            raw_df['Kredit'] = pd.to_numeric(raw_df['Kredit'], errors='coerce').fillna(0)
-            
-            total_debet = raw_df['Debet'].sum()
-            total_kredit = raw_df['Kredit'].sum()
+            total_debet = df_jurnal['Debet'].sum()
+            total_kredit = df_jurnal['Kredit'].sum()
             
             
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Total Debet", f"Rp {total_debet:,.2f}".replace(',', '.'))
+                st.metric("Total Debet", rupiah(total_debet))
             with col2:
-                st.metric("Total Kredit", f"Rp {total_kredit:,.2f}".replace(',', '.'))
+                st.metric("Total Kredit", rupiah(total_kredit))
+            
+            
+            hasil_cek = get_journal_check(wait=0.5)
+            if hasil_cek is None:
+                st.caption("Pemeriksaan keseimbangan jurnal sedang berjalan...")
+            elif not hasil_cek.empty:
+                st.warning(f"Ada {len(hasil_cek)} entri jurnal yang bermasalah.")
+                cek_df = hasil_cek.copy()
+                cek_df['Tanggal'] = format_tanggal(cek_df['Tanggal'])
+                for col in ['Debet', 'Kredit', 'Selisih']:
+                    cek_df[col] = format_rupiah(cek_df[col])
+                st.dataframe(cek_df, hide_index=True)
                 
             
             st.markdown("---")
@@ -143,7 +262,7 @@ def show_jurnal_umum():
         else:
             
             st.warning("Data jurnal umum tidak tersedia. Silakan gunakan tombol 'Tambah Data' untuk menambahkan data baru.")
-            st.info("Path file yang diharapkan: database/jurnal_umum.csv")
+            st.info(f"Path file yang diharapkan: database/jurnal_umum/{manifest['aktif']}.csv")
             
             
             st.markdown("---")
@@ -185,51 +304,76 @@ def show_jurnal_umum():
             st.subheader("Tambah Data Baru")
             with st.form("jurnal_add_form"):
                 tanggal = st.date_input("Tanggal")
-                keterangan = st.text_input("Keterangan")
-                debet = st.number_input("Debet", min_value=0.0, format="%f")
-                kredit = st.number_input("Kredit", min_value=0.0, format="%f")
+                # The editor keeps its edits on top of the frame it was first
+                # given, so that frame only changes once its state is gone.
+                if 'jurnal_add_lines' not in st.session_state:
+                    st.session_state.jurnal_add_lines_base = st.session_state.jurnal_add_lines_value
+                lines = st.data_editor(
+                    st.session_state.jurnal_add_lines_base,
+                    num_rows="dynamic",
+                    hide_index=True,
+                    key="jurnal_add_lines",
+                    column_config={
+                        'Akun': st.column_config.SelectboxColumn("Akun", options=get_akun_options()[0]),
+                        'Debet': st.column_config.NumberColumn("Debet", min_value=0, step=1, format="%d"),
+                        'Kredit': st.column_config.NumberColumn("Kredit", min_value=0, step=1, format="%d")
+                    }
+                )
+                st.session_state.jurnal_add_lines_value = lines
                 
                 submitted = st.form_submit_button("Simpan")
                 if submitted:
-                    add_jurnal_data(tanggal.strftime('%d/%m/%Y'), keterangan, debet, kredit)
-                    st.success("Data berhasil ditambahkan!")
-                    st.session_state.jurnal_show_add_form = False
-                    st.rerun()  
+                    errors = add_jurnal_entry(tanggal.strftime('%Y-%m-%d'), lines)
+                    if errors:
+                        for error in errors:
+                            st.error(error)
+                    else:
+                        st.success("Data berhasil ditambahkan!")
+                        st.session_state.jurnal_show_add_form = False
+                        del st.session_state.jurnal_add_lines_value
+                        st.rerun()  
     
     
     if st.session_state.jurnal_show_edit_form and 'df_jurnal' in locals():
         with st.container():
             st.markdown("---")
             
-            options = [f"{i} - {row['Keterangan']}" for i, row in df_jurnal.iterrows()]
-            if options:
-                selected_option = st.selectbox("Pilih data yang akan diedit:", options, key="jurnal_edit_select")
-                index = int(selected_option.split(" - ")[0])
-                st.session_state.jurnal_edit_index = index
+            options = pd.Series([f"{i} - {nama}" for i, nama in enumerate(df_jurnal['Keterangan'])], index=df_jurnal['ID'])
+            if not options.empty:
+                terakhir = st.session_state.jurnal_edit_id
+                row_id = st.selectbox("Pilih data yang akan diedit:", options.index, format_func=options.get, key="jurnal_edit_select",
+                                      index=options.index.get_loc(terakhir) if terakhir in options.index else 0)
+                index = options.index.get_loc(row_id)
+                st.session_state.jurnal_edit_id = row_id
                 
                 with st.form("jurnal_edit_form"):
                     
-                    try:
-                        date_value = pd.to_datetime(df_jurnal.loc[index, 'Tanggal'])
-                    except:
-                        date_value = pd.Timestamp.now()
-                    
-                    tanggal = st.date_input("Tanggal", value=date_value)
-                    keterangan = st.text_input("Keterangan", value=df_jurnal.loc[index, 'Keterangan'])
+                    date_value = df_jurnal.loc[index, 'Tanggal']
+                    tanggal = st.date_input("Tanggal", value=date_value if pd.notna(date_value) else None,
+                                            help="Kosongkan untuk baris lanjutan dari transaksi di atasnya")
+                    akun_options, akun_index = get_akun_options(df_jurnal.loc[index, 'Keterangan'])
+                    keterangan = st.selectbox("Akun", akun_options, index=akun_index)
                     
                     
-                    current_debet = pd.to_numeric(df_jurnal.loc[index, 'Debet'], errors='coerce') or 0.0
-                    current_kredit = pd.to_numeric(df_jurnal.loc[index, 'Kredit'], errors='coerce') or 0.0
+                    current_debet = to_money(df_jurnal.loc[index, 'Debet'])
+                    current_kredit = to_money(df_jurnal.loc[index, 'Kredit'])
                     
-                    debet = st.number_input("Debet", min_value=0.0, value=float(current_debet), format="%f")
-                    kredit = st.number_input("Kredit", min_value=0.0, value=float(current_kredit), format="%f")
+                    debet = st.number_input("Debet", min_value=0, value=current_debet, step=1000, format="%d")
+                    kredit = st.number_input("Kredit", min_value=0, value=current_kredit, step=1000, format="%d")
                     
                     submitted = st.form_submit_button("Perbarui")
                     if submitted:
-                        edit_jurnal_data(index, tanggal.strftime('%d/%m/%Y'), keterangan, debet, kredit)
-                        st.success("Data berhasil diperbarui!")
-                        st.session_state.jurnal_show_edit_form = False
-                        st.rerun()  
+                        try:
+                            errors = edit_jurnal_data(row_id, tanggal.strftime('%Y-%m-%d') if tanggal else None, keterangan, debet, kredit)
+                        except KeyError:
+                            errors = ["Baris ini sudah diubah atau dihapus oleh sesi lain. Muat ulang halaman lalu coba lagi."]
+                        if errors:
+                            for error in errors:
+                                st.error(error)
+                        else:
+                            st.success("Data berhasil diperbarui!")
+                            st.session_state.jurnal_show_edit_form = False
+                            st.rerun()  
             else:
                 st.warning("Tidak ada data yang dapat diedit.")
     
@@ -238,17 +382,31 @@ def show_jurnal_umum():
         with st.container():
             st.markdown("---")
             
-            options = [f"{i} - {row['Keterangan']}" for i, row in df_jurnal.iterrows()]
-            if options:
-                selected_option = st.selectbox("Pilih data yang akan dihapus:", options, key="jurnal_delete_select")
-                index = int(selected_option.split(" - ")[0])
-                st.session_state.jurnal_delete_index = index
+            options = pd.Series([f"{i} - {nama}" for i, nama in enumerate(df_jurnal['Keterangan'])], index=df_jurnal['ID'])
+            if not options.empty:
+                terakhir = st.session_state.jurnal_delete_id
+                row_id = st.selectbox("Pilih data yang akan dihapus:", options.index, format_func=options.get, key="jurnal_delete_select",
+                                      index=options.index.get_loc(terakhir) if terakhir in options.index else 0)
+                st.session_state.jurnal_delete_id = row_id
+                seluruh_entri = st.checkbox("Hapus seluruh entri transaksi baris ini", value=st.session_state.jurnal_delete_entry_value, key="jurnal_delete_entry")
+                st.session_state.jurnal_delete_entry_value = seluruh_entri
                 
                 
                 if st.button("Hapus", key="jurnal_delete_confirm"):
-                    delete_jurnal_data(index)
-                    st.success("Data berhasil dihapus!")
-                    st.session_state.jurnal_show_delete_form = False
-                    st.rerun()  
+                    try:
+                        if seluruh_entri:
+                            delete_jurnal_entry(row_id)
+                            errors = []
+                        else:
+                            errors = delete_jurnal_data(row_id)
+                    except KeyError:
+                        errors = ["Baris ini sudah diubah atau dihapus oleh sesi lain. Muat ulang halaman lalu coba lagi."]
+                    if errors:
+                        for error in errors:
+                            st.error(error)
+                    else:
+                        st.success("Data berhasil dihapus!")
+                        st.session_state.jurnal_show_delete_form = False
+                        st.rerun()  
             else:
                 st.warning("Tidak ada data yang dapat dihapus.")
\ No newline at end of file
@@ -1,8 +1,13 @@
 import streamlit as st
 from streamlit_option_menu import option_menu
 import pandas as pd
+import numpy as np
 import os
 import sys
+from function.formatting import format_rupiah, rupiah
+from function.pipeline import register_node, build
+import function.jurnal_saldo_setelah_penutupan
+from function.storage import load_table, save_table, add_row, update_row, delete_row
 
 
 def ensure_dir(directory):
@@ -11,291 +16,125 @@ def ensure_dir(directory):
 
 def load_neraca_data():
 
-    
-    
-    current_file = os.path.abspath(__file__)
-    project_root = os.path.dirname(os.path.dirname(current_file))
-    database_dir = os.path.join(project_root, 'database')
-    ensure_dir(database_dir)
-    
-    csv_path = os.path.join(database_dir, 'neraca.csv')
-    
-    
-    if os.path.exists(csv_path):
-        return pd.read_csv(csv_path)
-    else:
-        
-        return pd.DataFrame(columns=['AKTIVA', 'AKTIVA.1', 'AKTIVA.2', 'PASIVA', 'PASIVA.1', 'PASIVA.2'])
+    return load_table('neraca')
 
 def save_neraca_data(df):
 
-    current_file = os.path.abspath(__file__)
-    project_root = os.path.dirname(os.path.dirname(current_file))
-    database_dir = os.path.join(project_root, 'database')
-    ensure_dir(database_dir)
-    
-    csv_path = os.path.join(database_dir, 'neraca.csv')
-    df.to_csv(csv_path, index=False)
+    save_table('neraca', df)
 
 
+NERACA_COLUMNS = ['Sisi', 'Kelompok', 'Nama Akun', 'Nilai']
 
+NERACA_SECTIONS = [
+    ('aset_lancar', 'AKTIVA', 'Jumlah aset lancar'),
+    ('aset_tetap', 'AKTIVA', 'Jumlah aset tetap'),
+    ('liabilitas', 'PASIVA', 'Jumlah liabilitas'),
+    ('ekuitas', 'PASIVA', 'Jumlah ekuitas'),
+]
 
-def add_data(aktiva, nilai_aktiva1, nilai_aktiva2, pasiva, nilai_pasiva1, nilai_pasiva2):
-    df = load_neraca_data()
-    new_row = pd.DataFrame({
-        'AKTIVA': [aktiva], 
-        'AKTIVA.1': [nilai_aktiva1], 
-        'AKTIVA.2': [nilai_aktiva2], 
-        'PASIVA': [pasiva], 
-        'PASIVA.1': [nilai_pasiva1], 
-        'PASIVA.2': [nilai_pasiva2]
-    })
-    df = pd.concat([df, new_row], ignore_index=True)
-    save_neraca_data(df)
-    return df
+
+def add_data(sisi, kelompok, nama_akun, nilai):
+    add_row('neraca', {'Sisi': sisi, 'Kelompok': kelompok, 'Nama Akun': nama_akun, 'Nilai': nilai})
 
 
-def edit_data(index, aktiva, nilai_aktiva1, nilai_aktiva2, pasiva, nilai_pasiva1, nilai_pasiva2):
-    df = load_neraca_data()
-    df.loc[index, 'AKTIVA'] = aktiva
-    df.loc[index, 'AKTIVA.1'] = nilai_aktiva1
-    df.loc[index, 'AKTIVA.2'] = nilai_aktiva2
-    df.loc[index, 'PASIVA'] = pasiva
-    df.loc[index, 'PASIVA.1'] = nilai_pasiva1
-    df.loc[index, 'PASIVA.2'] = nilai_pasiva2
-    save_neraca_data(df)
-    return df
+def edit_data(index, sisi, kelompok, nama_akun, nilai):
+    update_row('neraca', index, {'Sisi': sisi, 'Kelompok': kelompok, 'Nama Akun': nama_akun, 'Nilai': nilai})
 
 
 def delete_data(index):
-    df = load_neraca_data()
-    df = df.drop(index)
-    df = df.reset_index(drop=True)
-    save_neraca_data(df)
-    return df
+    delete_row('neraca', index)
 
-def show_neraca():
+def compute_neraca(df_saldo, akun_df):
 
-    st.subheader("Neraca")
+    sections = pd.DataFrame(NERACA_SECTIONS, columns=['Kelompok', 'Sisi', 'Jumlah']).set_index('Kelompok')
     
     
-    if 'neraca_show_add_form' not in st.session_state:
-        st.session_state.neraca_show_add_form = False
-    if 'neraca_show_edit_form' not in st.session_state:
-        st.session_state.neraca_show_edit_form = False
-    if 'neraca_show_delete_form' not in st.session_state:
-        st.session_state.neraca_show_delete_form = False
-    if 'neraca_edit_index' not in st.session_state:
-        st.session_state.neraca_edit_index = 0
-    if 'neraca_delete_index' not in st.session_state:
-        st.session_state.neraca_delete_index = 0
+    kelompok = akun_df['Kelompok'].reindex(df_saldo['Akun']).to_numpy()
+    df = pd.DataFrame({
+        'Sisi': sections['Sisi'].reindex(kelompok).to_numpy(),
+        'Kelompok': kelompok,
+        'Nama Akun': df_saldo['Nama Akun'].to_numpy(),
+        'Nilai': (df_saldo['Debet'] - df_saldo['Kredit']).to_numpy()
+    })
+    df = df[df['Sisi'].notna()]
+    df.loc[df['Sisi'] == 'PASIVA', 'Nilai'] *= -1
+    
+    
+    urutan = pd.Categorical(df['Kelompok'], categories=sections.index, ordered=True)
+    return df.iloc[np.argsort(urutan.codes, kind='stable')].reset_index(drop=True)
+
+def generate_neraca():
+
+    return build('neraca')
+
+def neraca_totals(df_neraca):
+
+    kelompok = pd.Categorical(df_neraca['Kelompok'], categories=[section[0] for section in NERACA_SECTIONS])
+    jumlah = df_neraca['Nilai'].groupby(kelompok, observed=False).sum()
+    sisi = pd.Series({kode: nama for kode, nama, _ in NERACA_SECTIONS})
+    return jumlah, jumlah.groupby(sisi.reindex(jumlah.index).to_numpy()).sum()
+
+def build_neraca_sheet(df_neraca, jumlah):
+
+    # Each side is laid out as account lines followed by the section total in
+    # the Jumlah column; the two sides are then placed next to each other.
+    sides = []
+    for nama_sisi in ['AKTIVA', 'PASIVA']:
+        rows = []
+        for kode, sisi, label in NERACA_SECTIONS:
+            if sisi != nama_sisi:
+                continue
+            section = df_neraca[df_neraca['Kelompok'] == kode]
+            rows.append(pd.DataFrame({'Keterangan': section['Nama Akun'], 'Nilai': section['Nilai'], 'Jumlah': np.nan}))
+            rows.append(pd.DataFrame({'Keterangan': [label], 'Nilai': [np.nan], 'Jumlah': [jumlah[kode]]}))
+        side = pd.concat(rows, ignore_index=True)
+        side['Nilai'] = format_rupiah(side['Nilai'], blank_zero=True).where(side['Nilai'].notna(), '')
+        side['Jumlah'] = format_rupiah(side['Jumlah']).where(side['Jumlah'].notna(), '')
+        side.columns = pd.MultiIndex.from_product([[nama_sisi], side.columns])
+        sides.append(side)
+    return pd.concat(sides, axis=1).fillna('')
+
+def show_neraca():
+
+    st.subheader("Neraca")
     
     
     try:
         
-        df_neraca = load_neraca_data()
+        df_neraca = generate_neraca()
         
         if not df_neraca.empty:
             
-            display_df = df_neraca.copy()
-            
-            
-            
-            currency_cols = ['AKTIVA.1', 'AKTIVA.2', 'PASIVA.1', 'PASIVA.2']
-            for col in currency_cols:
-                if col in display_df.columns:
-                    
-                    display_df[col] = pd.to_numeric(display_df[col], errors='coerce').fillna(0)
-                    
-                    display_df[col] = display_df[col].apply(lambda x: f"Rp {x:,.2f}".replace(',', '.') if x != 0 else "")
+            jumlah, totals = neraca_totals(df_neraca)
             
             
-            st.table(display_df)
+            st.table(build_neraca_sheet(df_neraca, jumlah))
             
             
-            
-            current_file = os.path.abspath(__file__)
-            project_root = os.path.dirname(os.path.dirname(current_file))
-            csv_path = os.path.join(project_root, 'database', 'neraca.csv')
-            raw_df = pd.read_csv(csv_path)
-            
-            
-            for col in currency_cols:
-                if col in raw_df.columns:
-                    raw_df[col] = pd.to_numeric(raw_df[col], errors='coerce').fillna(0)
-            
-            
-            total_aktiva = 0
-            total_pasiva = 0
-            
-            if 'AKTIVA.2' in raw_df.columns:
-                total_aktiva = raw_df['AKTIVA.2'].sum()
-            
-            if 'PASIVA.2' in raw_df.columns:
-                total_pasiva = raw_df['PASIVA.2'].sum()
+            total_aktiva = totals.get('AKTIVA', 0)
+            total_pasiva = totals.get('PASIVA', 0)
             
             
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Total Aktiva", f"Rp {total_aktiva:,.2f}".replace(',', '.'))
+                st.metric("Total Aktiva", rupiah(total_aktiva))
             with col2:
-                st.metric("Total Pasiva", f"Rp {total_pasiva:,.2f}".replace(',', '.'))
-                
+                st.metric("Total Pasiva", rupiah(total_pasiva))
             
-            st.markdown("---")
-            
-            
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                if st.button('➕ Tambah Data', key="neraca_add_btn"):
-                    st.session_state.neraca_show_add_form = not st.session_state.neraca_show_add_form
-                    st.session_state.neraca_show_edit_form = False
-                    st.session_state.neraca_show_delete_form = False
-            with col2:
-                if st.button('✏️ Edit Data', key="neraca_edit_btn"):
-                    st.session_state.neraca_show_edit_form = not st.session_state.neraca_show_edit_form
-                    st.session_state.neraca_show_add_form = False
-                    st.session_state.neraca_show_delete_form = False
-            with col3:
-                if st.button('🗑️ Hapus Data', key="neraca_delete_btn"):
-                    st.session_state.neraca_show_delete_form = not st.session_state.neraca_show_delete_form
-                    st.session_state.neraca_show_add_form = False
-                    st.session_state.neraca_show_edit_form = False
+            if total_aktiva != total_pasiva:
+                st.warning(f"Neraca tidak seimbang, selisih {rupiah(total_aktiva - total_pasiva)}. Periksa kembali jurnal umum.")
         else:
-            
-            st.warning("Data neraca tidak tersedia. Silakan gunakan tombol 'Tambah Data' untuk menambahkan data baru.")
-            st.info("Path file yang diharapkan: database/neraca.csv")
-            
-            
-            st.markdown("---")
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                if st.button('➕ Tambah Data', key="neraca_add_btn_empty"):
-                    st.session_state.neraca_show_add_form = not st.session_state.neraca_show_add_form
-                    st.session_state.neraca_show_edit_form = False
-                    st.session_state.neraca_show_delete_form = False
-            with col2:
-                if st.button('✏️ Edit Data', key="neraca_edit_btn_empty", disabled=True):
-                    pass
-            with col3:
-                if st.button('🗑️ Hapus Data', key="neraca_delete_btn_empty", disabled=True):
-                    pass
+            st.warning("Belum ada saldo akun riil untuk disusun menjadi neraca.")
     except Exception as e:
         st.error(f"Terjadi kesalahan: {e}")
-        st.info("Pastikan format file CSV sesuai dengan format neraca")
-        
-        
-        st.markdown("---")
-        st.subheader("Menu Aksi")
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            if st.button('➕ Tambah Data', key="neraca_add_btn_error"):
-                st.session_state.neraca_show_add_form = not st.session_state.neraca_show_add_form
-                st.session_state.neraca_show_edit_form = False
-                st.session_state.neraca_show_delete_form = False
-        with col2:
-            if st.button('✏️ Edit Data', key="neraca_edit_btn_error", disabled=True):
-                pass
-        with col3:
-            if st.button('🗑️ Hapus Data', key="neraca_delete_btn_error", disabled=True):
-                pass
+        st.info("Pastikan saldo setelah penutupan dapat dihitung dari jurnal umum")
     
     
-    if st.session_state.neraca_show_add_form:
-        with st.expander("Form Tambah Data", expanded=True):
-            st.subheader("Tambah Data Baru")
-            with st.form("neraca_add_form"):
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.subheader("Aktiva")
-                    aktiva = st.text_input("Nama Aktiva")
-                    nilai_aktiva1 = st.number_input("Nilai Aktiva (Kolom 1)", min_value=0.0, format="%f")
-                    nilai_aktiva2 = st.number_input("Nilai Aktiva (Kolom 2)", min_value=0.0, format="%f")
-                
-                with col2:
-                    st.subheader("Pasiva")
-                    pasiva = st.text_input("Nama Pasiva")
-                    nilai_pasiva1 = st.number_input("Nilai Pasiva (Kolom 1)", min_value=0.0, format="%f")
-                    nilai_pasiva2 = st.number_input("Nilai Pasiva (Kolom 2)", min_value=0.0, format="%f")
-                
-                submitted = st.form_submit_button("Simpan")
-                if submitted:
-                    add_data(aktiva, nilai_aktiva1, nilai_aktiva2, pasiva, nilai_pasiva1, nilai_pasiva2)
-                    st.success("Data berhasil ditambahkan!")
-                    st.session_state.neraca_show_add_form = False
-                    st.rerun()  
-    
-    
-    if st.session_state.neraca_show_edit_form and 'df_neraca' in locals():
-        with st.container():
-            st.markdown("---")
-            
-            
-            options = []
-            for i, row in df_neraca.iterrows():
-                aktiva_label = row['AKTIVA'] if pd.notna(row['AKTIVA']) and row['AKTIVA'] != '' else "(Empty)"
-                pasiva_label = row['PASIVA'] if pd.notna(row['PASIVA']) and row['PASIVA'] != '' else "(Empty)"
-                options.append(f"{i} - Aktiva: {aktiva_label}, Pasiva: {pasiva_label}")
-                
-            if options:
-                selected_option = st.selectbox("Pilih data yang akan diedit:", options, key="neraca_edit_select")
-                index = int(selected_option.split(" - ")[0])
-                st.session_state.neraca_edit_index = index
-                
-                with st.form("neraca_edit_form"):
-                    col1, col2 = st.columns(2)
-                    
-                    
-                    aktiva_val = df_neraca.loc[index, 'AKTIVA'] if pd.notna(df_neraca.loc[index, 'AKTIVA']) else ""
-                    aktiva_val1 = pd.to_numeric(df_neraca.loc[index, 'AKTIVA.1'], errors='coerce') or 0.0
-                    aktiva_val2 = pd.to_numeric(df_neraca.loc[index, 'AKTIVA.2'], errors='coerce') or 0.0
-                    pasiva_val = df_neraca.loc[index, 'PASIVA'] if pd.notna(df_neraca.loc[index, 'PASIVA']) else ""
-                    pasiva_val1 = pd.to_numeric(df_neraca.loc[index, 'PASIVA.1'], errors='coerce') or 0.0
-                    pasiva_val2 = pd.to_numeric(df_neraca.loc[index, 'PASIVA.2'], errors='coerce') or 0.0
-                    
-                    with col1:
-                        st.subheader("Aktiva")
-                        aktiva = st.text_input("Nama Aktiva", value=aktiva_val)
-                        nilai_aktiva1 = st.number_input("Nilai Aktiva (Kolom 1)", min_value=0.0, value=float(aktiva_val1), format="%f")
-                        nilai_aktiva2 = st.number_input("Nilai Aktiva (Kolom 2)", min_value=0.0, value=float(aktiva_val2), format="%f")
-                    
-                    with col2:
-                        st.subheader("Pasiva")
-                        pasiva = st.text_input("Nama Pasiva", value=pasiva_val)
-                        nilai_pasiva1 = st.number_input("Nilai Pasiva (Kolom 1)", min_value=0.0, value=float(pasiva_val1), format="%f")
-                        nilai_pasiva2 = st.number_input("Nilai Pasiva (Kolom 2)", min_value=0.0, value=float(pasiva_val2), format="%f")
-                    
-                    submitted = st.form_submit_button("Perbarui")
-                    if submitted:
-                        edit_data(index, aktiva, nilai_aktiva1, nilai_aktiva2, pasiva, nilai_pasiva1, nilai_pasiva2)
-                        st.success("Data berhasil diperbarui!")
-                        st.session_state.neraca_show_edit_form = False
-                        st.rerun()  
-            else:
-                st.warning("Tidak ada data yang dapat diedit.")
-    
-    
-    if st.session_state.neraca_show_delete_form and 'df_neraca' in locals():
-        with st.container():
-            st.markdown("---")
-            
-            options = []
-            for i, row in df_neraca.iterrows():
-                aktiva_label = row['AKTIVA'] if pd.notna(row['AKTIVA']) and row['AKTIVA'] != '' else "(Empty)"
-                pasiva_label = row['PASIVA'] if pd.notna(row['PASIVA']) and row['PASIVA'] != '' else "(Empty)"
-                options.append(f"{i} - Aktiva: {aktiva_label}, Pasiva: {pasiva_label}")
-                
-            if options:
-                selected_option = st.selectbox("Pilih data yang akan dihapus:", options, key="neraca_delete_select")
-                index = int(selected_option.split(" - ")[0])
-                st.session_state.neraca_delete_index = index
-                
-                
-                if st.button("Hapus", key="neraca_delete_confirm"):
-                    delete_data(index)
-                    st.success("Data berhasil dihapus!")
-                    st.session_state.neraca_show_delete_form = False
-                    st.rerun()  
-            else:
-                st.warning("Tidak ada data yang dapat dihapus.")
\ No newline at end of file
+    st.markdown("---")
+    st.caption("Neraca disusun otomatis dari saldo setelah penutupan dan kelompok akun.")
+    if st.button('💾 Simpan ke File Neraca', key="neraca_write_btn"):
+        save_neraca_data(generate_neraca()[NERACA_COLUMNS])
+        st.success("File neraca berhasil diperbarui.")
+
+
+register_node('neraca', ['jurnal_saldo_setelah_penutupan', 'akun'], compute_neraca)
@@ -3,6 +3,9 @@ from streamlit_option_menu import option_menu
 import pandas as pd
 import os
 import sys
+from function.formatting import format_rupiah, rupiah, to_money
+from function.akun import get_akun_options
+from function.storage import load_table, save_table, add_row, update_row, delete_row, table_manifest
 
 
 def ensure_dir(directory):
@@ -11,57 +14,23 @@ def ensure_dir(directory):
 
 def load_neraca_saldo_data():
 
-    
-    
-    current_file = os.path.abspath(__file__)
-    project_root = os.path.dirname(os.path.dirname(current_file))
-    database_dir = os.path.join(project_root, 'database')
-    ensure_dir(database_dir)
-    
-    csv_path = os.path.join(database_dir, 'neraca_saldo_periode_sebelumnya.csv')
-    
-    
-    if os.path.exists(csv_path):
-        return pd.read_csv(csv_path)
-    else:
-        
-        return pd.DataFrame(columns=['Nama Akun', 'Debit', 'Kredit'])
+    return load_table('neraca_saldo_periode_sebelumnya')
 
-def save_neraca_saldo_data(df):
-
-    current_file = os.path.abspath(__file__)
-    project_root = os.path.dirname(os.path.dirname(current_file))
-    database_dir = os.path.join(project_root, 'database')
-    ensure_dir(database_dir)
-    
-    csv_path = os.path.join(database_dir, 'neraca_saldo_periode_sebelumnya.csv')
-    df.to_csv(csv_path, index=False)
+def save_neraca_saldo_data(df, expected=None):
 
+    save_table('neraca_saldo_periode_sebelumnya', df, expected=expected)
 
 
 def add_data(nama_akun, debit, kredit):
-    df = load_neraca_saldo_data()
-    new_row = pd.DataFrame({'Nama Akun': [nama_akun], 'Debit': [debit], 'Kredit': [kredit]})
-    df = pd.concat([df, new_row], ignore_index=True)
-    save_neraca_saldo_data(df)
-    return df
+    add_row('neraca_saldo_periode_sebelumnya', {'Nama Akun': nama_akun, 'Debit': debit, 'Kredit': kredit})
 
 
-def edit_data(index, nama_akun, debit, kredit):
-    df = load_neraca_saldo_data()
-    df.loc[index, 'Nama Akun'] = nama_akun
-    df.loc[index, 'Debit'] = debit
-    df.loc[index, 'Kredit'] = kredit
-    save_neraca_saldo_data(df)
-    return df
+def edit_data(row_id, nama_akun, debit, kredit):
+    update_row('neraca_saldo_periode_sebelumnya', row_id, {'Nama Akun': nama_akun, 'Debit': debit, 'Kredit': kredit})
 
 
-def delete_data(index):
-    df = load_neraca_saldo_data()
-    df = df.drop(index)
-    df = df.reset_index(drop=True)
-    save_neraca_saldo_data(df)
-    return df
+def delete_data(row_id):
+    delete_row('neraca_saldo_periode_sebelumnya', row_id)
 
 def show_neraca_saldo_periode_sebelumnya():
 
@@ -74,10 +43,10 @@ def show_neraca_saldo_periode_sebelumnya():
         st.session_state.show_edit_form = False
     if 'show_delete_form' not in st.session_state:
         st.session_state.show_delete_form = False
-    if 'edit_index' not in st.session_state:
-        st.session_state.edit_index = 0
-    if 'delete_index' not in st.session_state:
-        st.session_state.delete_index = 0
+    if 'edit_id' not in st.session_state:
+        st.session_state.edit_id = None
+    if 'delete_id' not in st.session_state:
+        st.session_state.delete_id = None
     
     
     try:
@@ -86,39 +55,28 @@ def show_neraca_saldo_periode_sebelumnya():
         
         if not df_neraca.empty:
             
-            display_df = df_neraca.copy()
+            display_df = df_neraca.drop(columns='ID')
             
             
             
             currency_cols = ['Debit', 'Kredit']
             for col in currency_cols:
                 
-                display_df[col] = pd.to_numeric(display_df[col], errors='coerce').fillna(0)
-                
-                display_df[col] = display_df[col].apply(lambda x: f"Rp {x:,.2f}".replace(',', '.'))
+                display_df[col] = format_rupiah(display_df[col])
             
             
             st.table(display_df)
             
             
-            current_file = os.path.abspath(__file__)
-            project_root = os.path.dirname(os.path.dirname(current_file))
-            csv_path = os.path.join(project_root, 'database', 'neraca_saldo_periode_sebelumnya.csv')
-            raw_df = pd.read_csv(csv_path)
-            
-            
-            raw_df['Debit'] = pd.to_numeric(raw_df['Debit'], errors='coerce').fillna(0)
-            raw_df['Kredit'] = pd.to_numeric(raw_df['Kredit'], errors='coerce').fillna(0)
-            
-            total_debit = raw_df['Debit'].sum()
-            total_kredit = raw_df['Kredit'].sum()
+            total_debit = df_neraca['Debit'].sum()
+            total_kredit = df_neraca['Kredit'].sum()
             
             
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Total Debit", f"Rp {total_debit:,.2f}".replace(',', '.'))
+                st.metric("Total Debit", rupiah(total_debit))
             with col2:
-                st.metric("Total Kredit", f"Rp {total_kredit:,.2f}".replace(',', '.'))
+                st.metric("Total Kredit", rupiah(total_kredit))
                 
             
             st.markdown("---")
@@ -143,7 +101,7 @@ def show_neraca_saldo_periode_sebelumnya():
         else:
             
             st.warning("Data neraca saldo tidak tersedia. Silakan gunakan tombol 'Tambah Data' untuk menambahkan data baru.")
-            st.info("Path file yang diharapkan: database/neraca_saldo_periode_sebelumnya.csv")
+            st.info(f"Path file yang diharapkan: database/jurnal_umum/{table_manifest('neraca_saldo_periode_sebelumnya')['aktif']}_saldo_awal.csv")
             
             
             st.markdown("---")
@@ -184,9 +142,9 @@ def show_neraca_saldo_periode_sebelumnya():
         with st.expander("Form Tambah Data", expanded=True):
             st.subheader("Tambah Data Baru")
             with st.form("nps_add_form"):
-                nama_akun = st.text_input("Nama Akun")
-                debit = st.number_input("Debit", min_value=0.0, format="%f")
-                kredit = st.number_input("Kredit", min_value=0.0, format="%f")
+                nama_akun = st.selectbox("Nama Akun", get_akun_options()[0])
+                debit = st.number_input("Debit", min_value=0, step=1000, format="%d")
+                kredit = st.number_input("Kredit", min_value=0, step=1000, format="%d")
                 
                 submitted = st.form_submit_button("Simpan")
                 if submitted:
@@ -200,27 +158,32 @@ def show_neraca_saldo_periode_sebelumnya():
         with st.container():
             st.markdown("---")
             
-            options = [f"{i} - {row['Nama Akun']}" for i, row in df_neraca.iterrows()]
-            if options:
-                selected_option = st.selectbox("Pilih data yang akan diedit:", options)
-                index = int(selected_option.split(" - ")[0])
-                st.session_state.edit_index = index
+            options = pd.Series([f"{i} - {nama}" for i, nama in enumerate(df_neraca['Nama Akun'])], index=df_neraca['ID'])
+            if not options.empty:
+                row_id = st.selectbox("Pilih data yang akan diedit:", options.index, format_func=options.get)
+                index = options.index.get_loc(row_id)
+                st.session_state.edit_id = row_id
                 
                 with st.form("nps_edit_form"):
-                    nama_akun = st.text_input("Nama Akun", value=df_neraca.loc[index, 'Nama Akun'])
+                    akun_options, akun_index = get_akun_options(df_neraca.loc[index, 'Nama Akun'])
+                    nama_akun = st.selectbox("Nama Akun", akun_options, index=akun_index)
                     
-                    current_debit = pd.to_numeric(df_neraca.loc[index, 'Debit'], errors='coerce') or 0.0
-                    current_kredit = pd.to_numeric(df_neraca.loc[index, 'Kredit'], errors='coerce') or 0.0
+                    current_debit = to_money(df_neraca.loc[index, 'Debit'])
+                    current_kredit = to_money(df_neraca.loc[index, 'Kredit'])
                     
-                    debit = st.number_input("Debit", min_value=0.0, value=float(current_debit), format="%f")
-                    kredit = st.number_input("Kredit", min_value=0.0, value=float(current_kredit), format="%f")
+                    debit = st.number_input("Debit", min_value=0, value=current_debit, step=1000, format="%d")
+                    kredit = st.number_input("Kredit", min_value=0, value=current_kredit, step=1000, format="%d")
                     
                     submitted = st.form_submit_button("Perbarui")
                     if submitted:
-                        edit_data(index, nama_akun, debit, kredit)
-                        st.success("Data berhasil diperbarui!")
-                        st.session_state.show_edit_form = False
-                        st.rerun()  
+                        try:
+                            edit_data(row_id, nama_akun, debit, kredit)
+                        except KeyError:
+                            st.error("Baris ini sudah diubah atau dihapus oleh sesi lain. Muat ulang halaman lalu coba lagi.")
+                        else:
+                            st.success("Data berhasil diperbarui!")
+                            st.session_state.show_edit_form = False
+                            st.rerun()  
             else:
                 st.warning("Tidak ada data yang dapat diedit.")
     
@@ -229,17 +192,20 @@ def show_neraca_saldo_periode_sebelumnya():
         with st.container():
             st.markdown("---")
             
-            options = [f"{i} - {row['Nama Akun']}" for i, row in df_neraca.iterrows()]
-            if options:
-                selected_option = st.selectbox("Pilih data yang akan dihapus:", options)
-                index = int(selected_option.split(" - ")[0])
-                st.session_state.delete_index = index
+            options = pd.Series([f"{i} - {nama}" for i, nama in enumerate(df_neraca['Nama Akun'])], index=df_neraca['ID'])
+            if not options.empty:
+                row_id = st.selectbox("Pilih data yang akan dihapus:", options.index, format_func=options.get)
+                st.session_state.delete_id = row_id
                 
                 
                 if st.button("Hapus", key="nps_delete_confirm"):
-                    delete_data(index)
-                    st.success("Data berhasil dihapus!")
-                    st.session_state.show_delete_form = False
-                    st.rerun()  
+                    try:
+                        delete_data(row_id)
+                    except KeyError:
+                        st.error("Baris ini sudah diubah atau dihapus oleh sesi lain. Muat ulang halaman lalu coba lagi.")
+                    else:
+                        st.success("Data berhasil dihapus!")
+                        st.session_state.show_delete_form = False
+                        st.rerun()  
             else:
                 st.warning("Tidak ada data yang dapat dihapus.")
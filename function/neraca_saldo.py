@@ -1,8 +1,14 @@
 import streamlit as st
 from streamlit_option_menu import option_menu
 import pandas as pd
+import numpy as np
 import os
 import sys
+from function.formatting import format_rupiah, rupiah
+from function.pipeline import register_node, build
+from function.akun import get_akun_df
+from function.posting import get_account_totals, get_saldo_awal
+from function.storage import load_table, save_table, add_row, update_row, delete_row
 
 
 def ensure_dir(directory):
@@ -11,244 +17,114 @@ def ensure_dir(directory):
 
 def load_neraca_saldo_data():
 
-    
-    
-    current_file = os.path.abspath(__file__)
-    project_root = os.path.dirname(os.path.dirname(current_file))
-    database_dir = os.path.join(project_root, 'database')
-    ensure_dir(database_dir)
-    
-    csv_path = os.path.join(database_dir, 'neraca_saldo.csv')
-    
-    
-    if os.path.exists(csv_path):
-        
-        if os.path.getsize(csv_path) == 0:
-            return pd.DataFrame(columns=['Nama Akun', 'Debet', 'Kredit'])
-        
-        
-        try:
-            df = pd.read_csv(csv_path)
-            
-            if df.empty or len(df.columns) < 3:
-                return pd.DataFrame(columns=['Nama Akun', 'Debet', 'Kredit'])
-            return df
-        except Exception as e:
-            st.error(f"Error membaca file neraca_saldo.csv: {e}")
-            return pd.DataFrame(columns=['Nama Akun', 'Debet', 'Kredit'])
-    else:
-        
-        df = pd.DataFrame(columns=['Nama Akun', 'Debet', 'Kredit'])
-        df.to_csv(csv_path, index=False)
-        return df
+    df = load_table('neraca_saldo')
+    if len(df.columns) < 3:
+        return pd.DataFrame(columns=['Nama Akun', 'Debet', 'Kredit'])
+    return df
 
 def save_neraca_saldo_data(df):
 
-    current_file = os.path.abspath(__file__)
-    project_root = os.path.dirname(os.path.dirname(current_file))
-    database_dir = os.path.join(project_root, 'database')
-    ensure_dir(database_dir)
-    
-    csv_path = os.path.join(database_dir, 'neraca_saldo.csv')
-    df.to_csv(csv_path, index=False)
+    save_table('neraca_saldo', df)
 
 
 def add_data(nama_akun, debet, kredit):
-    df = load_neraca_saldo_data()
-    new_row = pd.DataFrame({'Nama Akun': [nama_akun], 'Debet': [debet], 'Kredit': [kredit]})
-    df = pd.concat([df, new_row], ignore_index=True)
-    save_neraca_saldo_data(df)
-    return df
+    add_row('neraca_saldo', {'Nama Akun': nama_akun, 'Debet': debet, 'Kredit': kredit})
 
 
 def edit_data(index, nama_akun, debet, kredit):
-    df = load_neraca_saldo_data()
-    df.loc[index, 'Nama Akun'] = nama_akun
-    df.loc[index, 'Debet'] = debet
-    df.loc[index, 'Kredit'] = kredit
-    save_neraca_saldo_data(df)
-    return df
+    update_row('neraca_saldo', index, {'Nama Akun': nama_akun, 'Debet': debet, 'Kredit': kredit})
 
 
 def delete_data(index):
-    df = load_neraca_saldo_data()
-    df = df.drop(index)
-    df = df.reset_index(drop=True)
-    save_neraca_saldo_data(df)
-    return df
+    delete_row('neraca_saldo', index)
+
+def place_balances(mutasi, akun_df):
+
+    saldo = mutasi.groupby(level=0)[['Debet', 'Kredit']].sum()
+    saldo = saldo[saldo.index.isin(akun_df.index)]
+    akun = akun_df.loc[saldo.index]
+    
+    
+    normal_debet = (akun['Saldo Normal'] == 'debet').to_numpy()
+    net = (saldo['Debet'] - saldo['Kredit']).to_numpy()
+    saldo_normal = np.where(normal_debet, net, -net)
+    di_debet = normal_debet == (saldo_normal >= 0)
+    
+    df = pd.DataFrame({
+        'Akun': saldo.index,
+        'Nama Akun': akun['Nama Akun'].to_numpy(),
+        'Debet': np.where(di_debet, np.abs(net), 0),
+        'Kredit': np.where(di_debet, 0, np.abs(net)),
+        'Urutan': akun['Urutan'].to_numpy()
+    })
+    df = df[df['Debet'] + df['Kredit'] != 0]
+    return df.sort_values('Urutan').drop(columns='Urutan').reset_index(drop=True)
+
+def compute_neraca_saldo(saldo_awal, totals, akun_df):
+
+    return place_balances(pd.concat([saldo_awal, totals]), akun_df)
+
+def generate_neraca_saldo():
+
+    return build('neraca_saldo')
+
+def get_unknown_accounts():
+
+    akun_df = get_akun_df()
+    names = list(get_saldo_awal().index) + list(get_account_totals().index)
+    return sorted({name for name in names if name not in akun_df.index})
 
 def show_neraca_saldo():
 
     st.subheader("Neraca Saldo")
     
     
-    if 'ns_show_add_form' not in st.session_state:
-        st.session_state.ns_show_add_form = False
-    if 'ns_show_edit_form' not in st.session_state:
-        st.session_state.ns_show_edit_form = False
-    if 'ns_show_delete_form' not in st.session_state:
-        st.session_state.ns_show_delete_form = False
-    if 'ns_edit_index' not in st.session_state:
-        st.session_state.ns_edit_index = 0
-    if 'ns_delete_index' not in st.session_state:
-        st.session_state.ns_delete_index = 0
-    
-    
     try:
         
-        df_neraca = load_neraca_saldo_data()
+        df_neraca = generate_neraca_saldo()
         
         if not df_neraca.empty:
             
-            display_df = df_neraca.copy()
-            
+            display_df = df_neraca[['Nama Akun', 'Debet', 'Kredit']].copy()
             
             
             currency_cols = ['Debet', 'Kredit']
             for col in currency_cols:
-                
-                display_df[col] = pd.to_numeric(display_df[col], errors='coerce').fillna(0)
-                
-                display_df[col] = display_df[col].apply(lambda x: f"Rp {x:,.2f}".replace(',', '.'))
+                display_df[col] = format_rupiah(display_df[col], blank_zero=True)
             
             
             st.table(display_df)
             
             
-            
-            df_neraca['Debet'] = pd.to_numeric(df_neraca['Debet'], errors='coerce').fillna(0)
-            df_neraca['Kredit'] = pd.to_numeric(df_neraca['Kredit'], errors='coerce').fillna(0)
-            
             total_debet = df_neraca['Debet'].sum()
             total_kredit = df_neraca['Kredit'].sum()
             
             
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Total Debet", f"Rp {total_debet:,.2f}".replace(',', '.'))
+                st.metric("Total Debet", rupiah(total_debet))
             with col2:
-                st.metric("Total Kredit", f"Rp {total_kredit:,.2f}".replace(',', '.'))
-                
+                st.metric("Total Kredit", rupiah(total_kredit))
             
-            st.markdown("---")
-            
-            
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                if st.button('➕ Tambah Data', key="ns_add_btn"):
-                    st.session_state.ns_show_add_form = not st.session_state.ns_show_add_form
-                    st.session_state.ns_show_edit_form = False
-                    st.session_state.ns_show_delete_form = False
-            with col2:
-                if st.button('✏️ Edit Data', key="ns_edit_btn"):
-                    st.session_state.ns_show_edit_form = not st.session_state.ns_show_edit_form
-                    st.session_state.ns_show_add_form = False
-                    st.session_state.ns_show_delete_form = False
-            with col3:
-                if st.button('🗑️ Hapus Data', key="ns_delete_btn"):
-                    st.session_state.ns_show_delete_form = not st.session_state.ns_show_delete_form
-                    st.session_state.ns_show_add_form = False
-                    st.session_state.ns_show_edit_form = False
+            if total_debet != total_kredit:
+                st.warning(f"Neraca saldo tidak seimbang, selisih {rupiah(total_debet - total_kredit)}. Periksa kembali jurnal umum.")
         else:
-            
-            st.warning("Data neraca saldo tidak tersedia. Silakan gunakan tombol 'Tambah Data' untuk menambahkan data baru.")
-            st.info("Path file yang diharapkan: database/neraca_saldo.csv")
-            
-            
-            st.markdown("---")
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                if st.button('➕ Tambah Data', key="ns_add_btn_empty"):
-                    st.session_state.ns_show_add_form = not st.session_state.ns_show_add_form
-                    st.session_state.ns_show_edit_form = False
-                    st.session_state.ns_show_delete_form = False
-            with col2:
-                if st.button('✏️ Edit Data', key="ns_edit_btn_empty", disabled=True):
-                    pass
-            with col3:
-                if st.button('🗑️ Hapus Data', key="ns_delete_btn_empty", disabled=True):
-                    pass
-    except Exception as e:
-        st.error(f"Terjadi kesalahan: {e}")
-        st.info("Pastikan format file CSV sesuai (Nama Akun, Debet, Kredit)")
+            st.warning("Belum ada saldo akun. Isi neraca saldo periode sebelumnya atau jurnal umum terlebih dahulu.")
         
         
-        st.markdown("---")
-        st.subheader("Menu Aksi")
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            if st.button('➕ Tambah Data', key="ns_add_btn_error"):
-                st.session_state.ns_show_add_form = not st.session_state.ns_show_add_form
-                st.session_state.ns_show_edit_form = False
-                st.session_state.ns_show_delete_form = False
-        with col2:
-            if st.button('✏️ Edit Data', key="ns_edit_btn_error", disabled=True):
-                pass
-        with col3:
-            if st.button('🗑️ Hapus Data', key="ns_delete_btn_error", disabled=True):
-                pass
-    
-    
-    if st.session_state.ns_show_add_form:
-        with st.expander("Form Tambah Data", expanded=True):
-            st.subheader("Tambah Data Baru")
-            with st.form("ns_add_form"):
-                nama_akun = st.text_input("Nama Akun")
-                debet = st.number_input("Debet", min_value=0.0, format="%f")
-                kredit = st.number_input("Kredit", min_value=0.0, format="%f")
-                
-                submitted = st.form_submit_button("Simpan")
-                if submitted:
-                    add_data(nama_akun, debet, kredit)
-                    st.success("Data berhasil ditambahkan!")
-                    st.session_state.ns_show_add_form = False
-                    st.rerun()  
-    
-    
-    if st.session_state.ns_show_edit_form and 'df_neraca' in locals():
-        with st.container():
-            st.markdown("---")
-            
-            options = [f"{i} - {row['Nama Akun']}" for i, row in df_neraca.iterrows()]
-            if options:
-                selected_option = st.selectbox("Pilih data yang akan diedit:", options, key="ns_edit_select")
-                index = int(selected_option.split(" - ")[0])
-                st.session_state.ns_edit_index = index
-                
-                with st.form("ns_edit_form"):
-                    nama_akun = st.text_input("Nama Akun", value=df_neraca.loc[index, 'Nama Akun'])
-                    
-                    current_debet = pd.to_numeric(df_neraca.loc[index, 'Debet'], errors='coerce') or 0.0
-                    current_kredit = pd.to_numeric(df_neraca.loc[index, 'Kredit'], errors='coerce') or 0.0
-                    
-                    debet = st.number_input("Debet", min_value=0.0, value=float(current_debet), format="%f")
-                    kredit = st.number_input("Kredit", min_value=0.0, value=float(current_kredit), format="%f")
-                    
-                    submitted = st.form_submit_button("Perbarui")
-                    if submitted:
-                        edit_data(index, nama_akun, debet, kredit)
-                        st.success("Data berhasil diperbarui!")
-                        st.session_state.ns_show_edit_form = False
-                        st.rerun()  
-            else:
-                st.warning("Tidak ada data yang dapat diedit.")
+        unknown_accounts = get_unknown_accounts()
+        if unknown_accounts:
+            st.info(f"Akun berikut tidak dikenal dan tidak dimasukkan ke neraca saldo: {', '.join(unknown_accounts)}")
+    except Exception as e:
+        st.error(f"Terjadi kesalahan: {e}")
+        st.info("Pastikan format file jurnal umum dan neraca saldo periode sebelumnya sesuai")
     
     
-    if st.session_state.ns_show_delete_form and 'df_neraca' in locals():
-        with st.container():
-            st.markdown("---")
-            
-            options = [f"{i} - {row['Nama Akun']}" for i, row in df_neraca.iterrows()]
-            if options:
-                selected_option = st.selectbox("Pilih data yang akan dihapus:", options, key="ns_delete_select")
-                index = int(selected_option.split(" - ")[0])
-                st.session_state.ns_delete_index = index
-                
-                
-                if st.button("Hapus", key="ns_delete_confirm"):
-                    delete_data(index)
-                    st.success("Data berhasil dihapus!")
-                    st.session_state.ns_show_delete_form = False
-                    st.rerun()  
-            else:
-                st.warning("Tidak ada data yang dapat dihapus.")
\ No newline at end of file
+    st.markdown("---")
+    st.caption("Neraca saldo dihitung otomatis dari saldo periode sebelumnya dan buku besar.")
+    if st.button('💾 Simpan ke File Neraca Saldo', key="ns_write_btn"):
+        save_neraca_saldo_data(generate_neraca_saldo()[['Nama Akun', 'Debet', 'Kredit']])
+        st.success("File neraca saldo berhasil diperbarui.")
+
+
+register_node('neraca_saldo', ['saldo_awal', 'buku_besar', 'akun'], compute_neraca_saldo)
@@ -0,0 +1,127 @@
+import os
+import copy
+import json
+import threading
+import pandas as pd
+from function import cache
+from function.durable import replace_file
+from function.tanggal import parse_tanggal
+
+
+MANIFEST_FILE = 'manifest.json'
+
+_manifests = {}
+_adopted = set()
+_lock = threading.RLock()
+
+
+def period_of(tanggal):
+
+    return pd.Timestamp(tanggal).strftime('%Y-%m')
+
+def period_start(periode):
+
+    return pd.Timestamp(f'{periode}-01')
+
+def manifest_path(directory):
+
+    return os.path.join(directory, MANIFEST_FILE)
+
+def partition_file(directory, periode, suffix=''):
+
+    return os.path.join(directory, f'{periode}{suffix}.csv')
+
+def log_file(path):
+
+    return path.replace('.csv', '_log.csv')
+
+def read_manifest(directory, legacy=()):
+
+    # The manifest is a few lines of JSON looked up on every path resolution,
+    # so it is kept in memory and re-read only when the file changes. legacy
+    # lists the (path, suffix) of each table's file from before partitioning.
+    path = manifest_path(directory)
+    with _lock:
+        signature = cache.file_signature(path)
+        if signature[1] is None:
+            create_manifest(directory, legacy)
+            signature = cache.file_signature(path)
+        entry = _manifests.get(directory)
+        if entry is None or entry[0] != signature:
+            with open(path, encoding='utf-8') as f:
+                entry = (signature, json.load(f))
+            _manifests[directory] = entry
+        for legacy_path, suffix in legacy:
+            if (directory, legacy_path) not in _adopted:
+                adopt_legacy(directory, entry[1], legacy_path, suffix)
+                _adopted.add((directory, legacy_path))
+        return copy.deepcopy(entry[1])
+
+def write_manifest(directory, manifest):
+
+    path = manifest_path(directory)
+    with _lock:
+        replace_file(path, json.dumps(manifest, indent=4))
+        _manifests[directory] = (cache.file_signature(path), copy.deepcopy(manifest))
+
+def legacy_dates(legacy):
+
+    tanggal = []
+    for legacy_path, _ in legacy:
+        for path in (legacy_path, log_file(legacy_path)):
+            if os.path.exists(path) and os.path.getsize(path) > 0 and 'Tanggal' in pd.read_csv(path, nrows=0).columns:
+                tanggal.append(parse_tanggal(pd.read_csv(path, usecols=['Tanggal'])['Tanggal']))
+    return pd.concat(tanggal).dropna() if tanggal else pd.Series(dtype='datetime64[ns]')
+
+def create_manifest(directory, legacy=()):
+
+    # The files kept before partitioning become the open period as a whole:
+    # nothing in them has been closed yet. The period is named after the
+    # first month in the journal.
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    tanggal = legacy_dates(legacy)
+    periode = period_of(tanggal.min() if not tanggal.empty else pd.Timestamp.now())
+    write_manifest(directory, {
+        'aktif': periode,
+        'periode': {
+            periode: {'file': f'{periode}.csv', 'status': 'aktif', 'mulai': period_start(periode).strftime('%Y-%m-%d')}
+        }
+    })
+
+def adopt_legacy(directory, manifest, legacy_path, suffix=''):
+
+    # Runs after the manifest is on disk, so a crash halfway through is
+    # finished on the next start instead of leaving the file behind.
+    target = partition_file(directory, manifest['aktif'], suffix)
+    for source, destination in ((legacy_path, target), (log_file(legacy_path), log_file(target))):
+        if os.path.exists(source) and not os.path.exists(destination):
+            os.replace(source, destination)
+
+def closed_period_of(manifest, tanggal):
+
+    # Returns the closed period a date falls in, or None when it belongs to
+    # the open one.
+    if tanggal is None or pd.isna(tanggal):
+        return None
+    tanggal = pd.Timestamp(tanggal)
+    for periode, info in manifest['periode'].items():
+        if info['status'] == 'tertutup' and pd.Timestamp(info['mulai']) <= tanggal <= pd.Timestamp(info['sampai']):
+            return periode
+    return None
+
+def close_manifest(manifest, sampai):
+
+    # The open period is marked closed up to sampai and the next one opens
+    # the day after; nothing is written until the caller commits it.
+    sampai = pd.Timestamp(sampai)
+    periode = manifest['aktif']
+    mulai = sampai + pd.Timedelta(days=1)
+    baru = period_of(mulai)
+    if baru in manifest['periode']:
+        raise ValueError(f'Periode {baru} sudah ada')
+    manifest = copy.deepcopy(manifest)
+    manifest['periode'][periode].update(status='tertutup', sampai=sampai.strftime('%Y-%m-%d'))
+    manifest['periode'][baru] = {'file': f'{baru}.csv', 'status': 'aktif', 'mulai': mulai.strftime('%Y-%m-%d')}
+    manifest['aktif'] = baru
+    return manifest, baru
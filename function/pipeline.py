@@ -0,0 +1,118 @@
+import threading
+import time
+import pandas as pd
+from function.cache import frame_hash
+
+
+NODES = {}
+
+_state = {}
+_lock = threading.RLock()
+_run = {'depth': 0, 'seen': set(), 'rebuilt': []}
+
+
+def register_source(name, signature, compute):
+
+    NODES[name] = {'deps': [], 'signature': signature, 'compute': compute}
+
+def register_node(name, deps, compute):
+
+    NODES[name] = {'deps': list(deps), 'signature': None, 'compute': compute}
+
+def content_hash(value):
+
+    if isinstance(value, pd.DataFrame):
+        return (tuple(value.columns), len(value), frame_hash(value))
+    if isinstance(value, pd.Series):
+        return (value.name, len(value), frame_hash(value.to_frame()))
+    return hash(repr(value))
+
+def evaluate(name):
+
+    # A source node is re-read when its signature (the storage version) moves;
+    # a derived node is recomputed when the hash of any input moves. A node
+    # whose new output hashes the same as before leaves its dependents alone.
+    if name in _run['seen']:
+        return _state[name]
+    node = NODES[name]
+    entry = _state.get(name)
+
+    if node['signature'] is not None:
+        signature = node['signature']()
+        inputs = []
+    else:
+        inputs = [evaluate(dep) for dep in node['deps']]
+        signature = tuple(dep['hash'] for dep in inputs)
+
+    if entry is None or entry['signature'] != signature:
+        start = time.perf_counter()
+        value = node['compute'](*[dep['value'] for dep in inputs])
+        seconds = time.perf_counter() - start
+        value_hash = content_hash(value)
+        entry = {
+            'signature': signature,
+            'value': value,
+            'hash': value_hash,
+            'seconds': seconds,
+            'changed': entry is None or entry['hash'] != value_hash
+        }
+        _state[name] = entry
+        _run['rebuilt'].append((name, seconds, entry['changed']))
+
+    _run['seen'].add(name)
+    return entry
+
+def build(name):
+
+    with _lock:
+        if _run['depth'] == 0:
+            _run['seen'] = set()
+            _run['rebuilt'] = []
+        _run['depth'] += 1
+        try:
+            value = evaluate(name)['value']
+        finally:
+            _run['depth'] -= 1
+        return value.copy() if hasattr(value, 'copy') else value
+
+def build_all():
+
+    # Evaluates every registered node in one run, e.g. so a new period is
+    # computed before anyone opens a page.
+    with _lock:
+        if _run['depth'] == 0:
+            _run['seen'] = set()
+            _run['rebuilt'] = []
+        _run['depth'] += 1
+        try:
+            for name in list(NODES):
+                evaluate(name)
+        finally:
+            _run['depth'] -= 1
+
+def last_rebuilt():
+
+    with _lock:
+        return pd.DataFrame(_run['rebuilt'], columns=['Node', 'Detik', 'Berubah'])
+
+def pipeline_status():
+
+    with _lock:
+        rows = []
+        for name, node in NODES.items():
+            entry = _state.get(name)
+            rows.append({
+                'Node': name,
+                'Sumber': ', '.join(node['deps']),
+                'Hash': entry['hash'] if entry else None,
+                'Detik': entry['seconds'] if entry else None
+            })
+        return pd.DataFrame(rows)
+
+def invalidate_pipeline(name=None):
+
+    with _lock:
+        if name is None:
+            _state.clear()
+        else:
+            _state.pop(name, None)
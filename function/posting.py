@@ -0,0 +1,278 @@
+import pandas as pd
+import numpy as np
+import threading
+from function.jurnal_umum import load_jurnal_umum_data
+from function.neraca_periode_sebelumnya import load_neraca_saldo_data as load_saldo_awal_data
+from function.akun import resolve_account_names, get_akun
+from function.pipeline import register_source, register_node
+from function.storage import table_version, get_storage
+from function.tanggal import parse_tanggal
+from function.formatting import to_money
+
+
+POSTING_COLUMNS = ['Baris', 'ID', 'Entri', 'Tanggal', 'Akun', 'Keterangan', 'Debet', 'Kredit']
+LEDGER_COLUMNS = POSTING_COLUMNS + ['Saldo']
+INCREMENTAL_LIMIT = 50
+
+_state = {'jurnal': None, 'akun': None, 'versi': None, 'posted': None, 'ledgers': {}}
+_saldo_awal = {'versi': None, 'saldo': None, 'netto': {}}
+_lock = threading.Lock()
+
+
+def post_journal(jurnal_df, start=0, entri_awal=0, tanggal_awal=None):
+
+    # A line with a Tanggal opens a new entry; the continuation lines below
+    # it have an empty Tanggal and belong to the same entry.
+    tanggal = parse_tanggal(jurnal_df['Tanggal'].reset_index(drop=True))
+    is_new_entry = tanggal.notna()
+    tanggal = tanggal.ffill()
+    if tanggal_awal is not None:
+        tanggal = tanggal.fillna(tanggal_awal)
+    posted = pd.DataFrame({
+        'Baris': np.arange(start, start + len(jurnal_df)),
+        'ID': jurnal_df['ID'].to_numpy(),
+        'Entri': entri_awal + is_new_entry.cumsum().to_numpy(),
+        'Tanggal': tanggal.to_numpy(),
+        'Akun': resolve_account_names(jurnal_df['Keterangan']).to_numpy(),
+        'Keterangan': jurnal_df['Keterangan'].to_numpy(),
+        'Debet': to_money(jurnal_df['Debet']).to_numpy(),
+        'Kredit': to_money(jurnal_df['Kredit']).to_numpy()
+    }, columns=POSTING_COLUMNS)
+    return posted[posted['Akun'] != '']
+
+def index_ledger(ledger):
+
+    # Ordered by date, Saldo is the prefix sum of Debet - Kredit, so the
+    # balance at any date is one binary search away.
+    ledger = ledger.sort_values(['Tanggal', 'Baris'], kind='stable', na_position='last')
+    return ledger.assign(Saldo=(ledger['Debet'] - ledger['Kredit']).cumsum())
+
+def group_ledgers(posted):
+
+    return {akun: index_ledger(ledger) for akun, ledger in posted.groupby('Akun', sort=False)}
+
+def changed_rows(old, new):
+
+    old_values = old.astype(object).where(old.notna(), None).to_numpy()
+    new_values = new.astype(object).where(new.notna(), None).to_numpy()
+    return np.flatnonzero((old_values != new_values).any(axis=1))
+
+def repost_appended(state, jurnal_df):
+
+    old_len = len(state['jurnal'])
+    posted = state['posted']
+    entri_awal = int(posted['Entri'].iloc[-1]) if not posted.empty else 0
+    tanggal_awal = posted['Tanggal'].iloc[-1] if not posted.empty else None
+
+    tail = post_journal(jurnal_df.iloc[old_len:], start=old_len, entri_awal=entri_awal, tanggal_awal=tanggal_awal)
+    state['posted'] = pd.concat([posted, tail], ignore_index=True)
+    return set(tail['Akun'])
+
+def repost_changed(state, jurnal_df, rows):
+
+    posted = state['posted'].set_index('Baris', drop=False)
+    tanggal = parse_tanggal(jurnal_df['Tanggal'].reset_index(drop=True))
+    old_tanggal = parse_tanggal(state['jurnal']['Tanggal'].reset_index(drop=True))
+    dated_rows = np.flatnonzero(tanggal.notna().to_numpy())
+    touched = set()
+
+    for row in rows:
+        # The line's date and entry number also carry over to every undated
+        # continuation line up to the next dated one.
+        later = dated_rows[dated_rows > row]
+        end = int(later[0]) if len(later) else len(jurnal_df)
+        earlier = dated_rows[dated_rows < row]
+        if len(earlier):
+            tanggal_awal = tanggal.iloc[earlier[-1]]
+            entri_awal = len(earlier)
+        else:
+            tanggal_awal, entri_awal = None, 0
+
+        span = post_journal(jurnal_df.iloc[row:end], start=row, entri_awal=entri_awal, tanggal_awal=tanggal_awal)
+        old_span = posted[(posted['Baris'] >= row) & (posted['Baris'] < end)]
+        touched.update(old_span['Akun'])
+        touched.update(span['Akun'])
+
+        shift = int(tanggal.notna().iloc[row]) - int(old_tanggal.notna().iloc[row])
+        posted = posted[(posted['Baris'] < row) | (posted['Baris'] >= end)]
+        if shift:
+            later_mask = posted['Baris'] >= end
+            posted.loc[later_mask, 'Entri'] += shift
+            touched.update(posted.loc[later_mask, 'Akun'])
+        posted = pd.concat([posted, span.set_index('Baris', drop=False)]).sort_index()
+
+    state['posted'] = posted.reset_index(drop=True)
+    return touched
+
+def refresh_posting():
+
+    # Unchanged versions mean nothing was written since the last refresh, so
+    # the journal is neither loaded nor compared. They are read before the
+    # load: a write in between only makes the next refresh look again.
+    akun_version = table_version('akun')
+    versi = (get_storage(), table_version('jurnal_umum'), akun_version)
+    with _lock:
+        if _state['versi'] == versi:
+            return _state
+    jurnal_df = load_jurnal_umum_data()
+    with _lock:
+        state = _state
+        old = state['jurnal']
+        touched = None
+
+        # A changed chart of accounts can remap any line, so it forces a full repost.
+        if old is not None and state['akun'] == akun_version and len(jurnal_df) >= len(old) and not old.empty:
+            if jurnal_df.iloc[:len(old)].reset_index(drop=True).equals(old.reset_index(drop=True)):
+                if len(jurnal_df) == len(old):
+                    state['versi'] = versi
+                    return state
+                touched = repost_appended(state, jurnal_df)
+            elif len(jurnal_df) == len(old):
+                rows = changed_rows(old, jurnal_df)
+                if len(rows) <= INCREMENTAL_LIMIT:
+                    touched = repost_changed(state, jurnal_df, rows)
+
+        if touched is None:
+            state['posted'] = post_journal(jurnal_df)
+            state['ledgers'] = group_ledgers(state['posted'])
+        else:
+            posted = state['posted']
+            for akun in touched:
+                ledger = posted[posted['Akun'] == akun]
+                if ledger.empty:
+                    state['ledgers'].pop(akun, None)
+                else:
+                    state['ledgers'][akun] = index_ledger(ledger)
+        state['jurnal'] = jurnal_df
+        state['akun'] = akun_version
+        state['versi'] = versi
+        return state
+
+def get_posting():
+
+    return refresh_posting()['posted'].copy()
+
+def get_ledgers():
+
+    return dict(refresh_posting()['ledgers'])
+
+def get_ledger(akun):
+
+    ledger = refresh_posting()['ledgers'].get(akun)
+    if ledger is None:
+        return pd.DataFrame(columns=LEDGER_COLUMNS)
+    return ledger.copy()
+
+def account_totals(posted):
+
+    return posted.groupby('Akun', sort=False)[['Debet', 'Kredit']].sum()
+
+def get_account_totals():
+
+    return account_totals(refresh_posting()['posted'])
+
+def tanggal_akhir(posted):
+
+    tanggal = posted['Tanggal'].max()
+    return tanggal if pd.notna(tanggal) else None
+
+def get_tanggal_akhir():
+
+    return tanggal_akhir(refresh_posting()['posted'])
+
+def saldo_awal_of(saldo_df):
+
+    saldo = pd.DataFrame({
+        'Akun': resolve_account_names(saldo_df['Nama Akun']),
+        'Debet': to_money(saldo_df['Debit']),
+        'Kredit': to_money(saldo_df['Kredit'])
+    })
+    return saldo[saldo['Akun'] != ''].groupby('Akun', sort=False)[['Debet', 'Kredit']].sum()
+
+def saldo_awal_state():
+
+    # The opening balances only change with their table or the chart of
+    # accounts, so they are resolved and grouped once per version instead
+    # of on every balance lookup.
+    versi = (get_storage(), table_version('neraca_saldo_periode_sebelumnya'), table_version('akun'))
+    with _lock:
+        if _saldo_awal['versi'] == versi:
+            return dict(_saldo_awal)
+    saldo = saldo_awal_of(load_saldo_awal_data())
+    netto = dict(zip(saldo.index, (saldo['Debet'] - saldo['Kredit']).astype(int).tolist()))
+    with _lock:
+        _saldo_awal.update(versi=versi, saldo=saldo, netto=netto)
+        return dict(_saldo_awal)
+
+def get_saldo_awal():
+
+    return saldo_awal_state()['saldo'].copy()
+
+def saldo_direction(akun):
+
+    info = get_akun(akun)
+    return -1 if info and info['Saldo Normal'] == 'kredit' else 1
+
+def get_saldo_awal_akun(akun):
+
+    return saldo_awal_state()['netto'].get(akun, 0)
+
+def balance_as_of(akun, tanggal):
+
+    saldo = get_saldo_awal_akun(akun)
+    ledger = refresh_posting()['ledgers'].get(akun)
+    if ledger is not None:
+        n = np.searchsorted(ledger['Tanggal'].to_numpy(), pd.Timestamp(tanggal).to_datetime64(), side='right')
+        if n:
+            saldo += int(ledger['Saldo'].to_numpy()[n - 1])
+    return saldo * saldo_direction(akun)
+
+def periode_awal(posted):
+
+    tanggal = posted['Tanggal'].dropna()
+    return tanggal.min().replace(day=1) if not tanggal.empty else pd.NaT
+
+def get_periode_awal():
+
+    return periode_awal(refresh_posting()['posted'])
+
+def get_ledger_last_date(akun):
+
+    ledger = refresh_posting()['ledgers'].get(akun)
+    tanggal = ledger['Tanggal'].dropna() if ledger is not None else pd.Series(dtype='datetime64[ns]')
+    return tanggal.iloc[-1].date() if not tanggal.empty else pd.Timestamp.now().date()
+
+def build_running_balance(akun):
+
+    ledger = get_ledger(akun)
+    awal = pd.DataFrame({'Tanggal': [get_periode_awal()], 'Debet': [0], 'Kredit': [0], 'Saldo': [0]})
+    running = pd.concat([awal, ledger[['Tanggal', 'Debet', 'Kredit', 'Saldo']]], ignore_index=True)
+    running['Saldo'] = (running['Saldo'] + get_saldo_awal_akun(akun)) * saldo_direction(akun)
+    return running
+
+def ledger_sheet(akun, ledger, saldo_awal, periode_awal):
+
+    debet_rows = ledger.loc[ledger['Debet'] != 0, ['Tanggal', 'Debet']]
+    kredit_rows = ledger.loc[ledger['Kredit'] != 0, ['Tanggal', 'Kredit']]
+
+    if akun in saldo_awal.index:
+        awal = saldo_awal.loc[akun]
+        if awal['Debet']:
+            debet_rows = pd.concat([pd.DataFrame({'Tanggal': [periode_awal], 'Debet': [awal['Debet']]}), debet_rows])
+        if awal['Kredit']:
+            kredit_rows = pd.concat([pd.DataFrame({'Tanggal': [periode_awal], 'Kredit': [awal['Kredit']]}), kredit_rows])
+
+    # Int64 keeps the shorter side padded with <NA> instead of turning it into floats.
+    debet_rows = debet_rows.reset_index(drop=True).astype({'Debet': 'Int64'})
+    kredit_rows = kredit_rows.reset_index(drop=True).rename(columns={'Tanggal': 'Tanggal.1'}).astype({'Kredit': 'Int64'})
+    return pd.concat([debet_rows, kredit_rows], axis=1)[['Tanggal', 'Debet', 'Tanggal.1', 'Kredit']]
+
+def build_ledger_sheet(akun):
+
+    return ledger_sheet(akun, get_ledger(akun), saldo_awal_state()['saldo'], get_periode_awal())
+
+
+register_source('jurnal_umum', lambda: (table_version('jurnal_umum'), table_version('akun')), get_posting)
+register_source('saldo_awal', lambda: (table_version('neraca_saldo_periode_sebelumnya'), table_version('akun')), get_saldo_awal)
+register_node('buku_besar', ['jurnal_umum'], account_totals)
+register_node('tanggal_akhir', ['jurnal_umum'], tanggal_akhir)
@@ -0,0 +1,871 @@
+import pandas as pd
+import io
+import os
+import sqlite3
+import threading
+import datetime
+import uuid
+import time
+import random
+from contextlib import ExitStack
+from function import cache
+from function.durable import replace_file, append_text, flush_path, trim_torn_tail
+from function.partitions import read_manifest, write_manifest, close_manifest, partition_file
+from function.tanggal import parse_tanggal
+from function.formatting import to_money
+
+
+def ensure_dir(directory):
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+def get_database_dir():
+
+    current_file = os.path.abspath(__file__)
+    project_root = os.path.dirname(os.path.dirname(current_file))
+    database_dir = os.path.join(project_root, 'database')
+    ensure_dir(database_dir)
+    return database_dir
+
+
+TABLES = {
+    'akun': {
+        'file': 'akun.csv',
+        'columns': ['Kode', 'Akun', 'Nama Akun', 'Tipe', 'Saldo Normal', 'Kelompok'],
+        'money': [],
+        'index': ['Akun']
+    },
+    'jurnal_umum': {
+        'file': 'jurnal_umum.csv',
+        'columns': ['ID', 'Tanggal', 'Keterangan', 'Debet', 'Kredit'],
+        'money': ['Debet', 'Kredit'],
+        'index': ['Tanggal'],
+        'dates': ['Tanggal'],
+        'ids': True,
+        'log': True,
+        'partitions': 'jurnal_umum'
+    },
+    'neraca_saldo_periode_sebelumnya': {
+        'file': 'neraca_saldo_periode_sebelumnya.csv',
+        'columns': ['ID', 'Nama Akun', 'Debit', 'Kredit'],
+        'money': ['Debit', 'Kredit'],
+        'index': ['Nama Akun'],
+        'ids': True,
+        'partitions': 'jurnal_umum',
+        'partition_suffix': '_saldo_awal'
+    },
+    'neraca_saldo': {
+        'file': 'neraca_saldo.csv',
+        'columns': ['Nama Akun', 'Debet', 'Kredit'],
+        'money': ['Debet', 'Kredit'],
+        'index': ['Nama Akun']
+    },
+    'neraca_lajur': {
+        'file': 'neraca_lajur.csv',
+        'columns': [
+            'Nama Akun',
+            'Neraca Saldo Debet',
+            'Neraca Saldo Kredit',
+            'Laba Rugi Debet',
+            'Laba Rugi Kredit',
+            'Neraca Debet',
+            'Neraca Kredit'
+        ],
+        'money': [
+            'Neraca Saldo Debet',
+            'Neraca Saldo Kredit',
+            'Laba Rugi Debet',
+            'Laba Rugi Kredit',
+            'Neraca Debet',
+            'Neraca Kredit'
+        ],
+        'index': ['Nama Akun']
+    },
+    'jurnal_penutup': {
+        'file': 'jurnal_penutup.csv',
+        'columns': ['Tanggal', 'Keterangan', 'Debet', 'Kredit', 'Memo'],
+        'money': ['Debet', 'Kredit'],
+        'index': ['Tanggal'],
+        'dates': ['Tanggal']
+    },
+    'jurnal_saldo_setelah_penutupan': {
+        'file': 'jurnal_saldo_setelah_penutupan.csv',
+        'columns': ['Nama Akun', 'Debet', 'Kredit'],
+        'money': ['Debet', 'Kredit'],
+        'index': ['Nama Akun']
+    },
+    'neraca': {
+        'file': 'neraca.csv',
+        'columns': ['Sisi', 'Kelompok', 'Nama Akun', 'Nilai'],
+        'money': ['Nilai'],
+        'index': ['Kelompok']
+    },
+    'lap_labarugi': {
+        'file': 'lap_labarugi.csv',
+        'columns': ['Kategori', 'Akun', 'Debet', 'Kredit'],
+        'money': ['Debet', 'Kredit'],
+        'index': ['Kategori']
+    },
+    'lap_perubahanmodal': {
+        'file': 'lap_perubahanmodal.csv',
+        'columns': ['Keterangan', 'Debet', 'Kredit'],
+        'money': ['Debet', 'Kredit'],
+        'index': []
+    }
+}
+
+BUKU_BESAR_COLUMNS = ['Tanggal', 'Debet', 'Tanggal.1', 'Kredit']
+LOG_COMPACT_THRESHOLD = 500
+REBASE_RETRIES = 10
+
+
+class VersionConflict(Exception):
+    pass
+
+
+def type_columns(table, df, tahun=None):
+
+    for col in TABLES[table]['money']:
+        if col in df.columns:
+            df[col] = to_money(df[col])
+    for col in TABLES[table].get('dates', []):
+        if col in df.columns:
+            df[col] = parse_tanggal(df[col], tahun)
+    return df
+
+def tahun_periode(storage, table):
+
+    # Dates written without a year (such as "1 Maret") belong to the period
+    # of the journal.
+    if table == 'jurnal_umum' or not TABLES[table].get('dates'):
+        return None
+    tanggal = storage.load('jurnal_umum')['Tanggal'].dropna()
+    return int(tanggal.max().year) if not tanggal.empty else None
+
+def money_for_file(table, df):
+
+    # Zero amounts are written as empty cells, the way the journal has
+    # always been kept by hand.
+    df = df.copy()
+    for col in TABLES[table]['money']:
+        if col in df.columns:
+            amounts = to_money(df[col])
+            df[col] = amounts.astype('Int64').where(amounts != 0)
+    return df
+
+def new_id():
+
+    return uuid.uuid4().hex
+
+def ensure_ids(table, df):
+
+    # Rows written before IDs existed, or typed into the CSV by hand, get
+    # one the first time the table is read.
+    if not TABLES[table].get('ids'):
+        return df, False
+    if 'ID' in df.columns:
+        missing = df['ID'].isna() | (df['ID'].astype(str).str.strip() == '')
+        if not missing.any():
+            return df, False
+        df = df.copy()
+        df['ID'] = df['ID'].astype(object)
+    else:
+        df = df.copy()
+        df.insert(0, 'ID', None)
+        missing = df['ID'].isna()
+    df.loc[missing, 'ID'] = [new_id() for _ in range(int(missing.sum()))]
+    return df, True
+
+def with_id(table, row):
+
+    if TABLES[table].get('ids') and not row.get('ID'):
+        return dict(row, ID=new_id())
+    return row
+
+def clean_row(table, row):
+
+    return {col: to_money(value) if col in TABLES[table]['money'] else value for col, value in row.items()}
+
+def to_iso(value):
+
+    if isinstance(value, (pd.Timestamp, datetime.date)) and not pd.isna(value):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+def rebase_and_save(storage, table, change, retries=REBASE_RETRIES):
+
+    # Optimistic concurrency: the change is applied to the table as it was
+    # read and saved only if no one wrote in between; otherwise it is
+    # replayed on the newer table after a short randomized backoff.
+    for attempt in range(retries):
+        version = storage.table_version(table)
+        df = change(storage.load(table))
+        try:
+            storage.save(table, df, expected=version)
+            return df
+        except VersionConflict:
+            time.sleep(random.uniform(0, min(0.2, 0.005 * 2 ** attempt)))
+
+    # Still losing the race: the last rebase runs under the table lock, so
+    # no other session in this process can write in between.
+    with storage.lock(table):
+        version = storage.table_version(table)
+        df = change(storage.load(table))
+        storage.save(table, df, expected=version)
+        return df
+
+def check_expected(storage, expected):
+
+    for table, version in (expected or {}).items():
+        if storage.table_version(table) != version:
+            raise VersionConflict(f'Tabel {table} sudah diubah oleh sesi lain')
+
+def row_position(table, df, key):
+
+    if not TABLES[table].get('ids'):
+        return key
+    try:
+        return pd.Index(df['ID']).get_loc(key)
+    except KeyError:
+        raise KeyError(f'ID {key} tidak ditemukan di tabel {table}') from None
+
+def register_table(name, filename, columns, money=None, index=None, dates=None):
+
+    if name not in TABLES:
+        TABLES[name] = {
+            'file': filename,
+            'columns': list(columns),
+            'money': list(money or []),
+            'index': list(index or []),
+            'dates': list(dates or [])
+        }
+    else:
+        TABLES[name]['file'] = filename
+    return TABLES[name]
+
+def register_buku_besar_table(akun, filename):
+
+    return register_table(
+        f'bukbes_{akun}',
+        os.path.join('bukubesar', filename),
+        BUKU_BESAR_COLUMNS,
+        money=['Debet', 'Kredit'],
+        index=['Tanggal'],
+        dates=['Tanggal', 'Tanggal.1']
+    )
+
+
+class CsvStorage:
+
+    def __init__(self, database_dir):
+        self.database_dir = database_dir
+        self.writes = {}
+        self.indexes = {}
+        self.locks = {}
+        self.locks_guard = threading.Lock()
+        self.log_sizes = {}
+        self.trimmed_logs = set()
+
+    def table_path(self, table):
+        # A partitioned table reads and writes only its open period; closed
+        # periods sit next to it as read-only files.
+        if TABLES[table].get('partitions'):
+            return self.partition_path(table, self.manifest(table)['aktif'])
+        return os.path.join(self.database_dir, TABLES[table]['file'])
+
+    def partition_path(self, table, periode):
+        return partition_file(self.partition_dir(table), periode, TABLES[table].get('partition_suffix', ''))
+
+    def partition_group(self, table):
+        # Tables partitioned under one manifest open and close their periods
+        # together.
+        return sorted(name for name, spec in TABLES.items() if spec.get('partitions') == TABLES[table]['partitions'])
+
+    def partition_dir(self, table):
+        return os.path.join(self.database_dir, TABLES[table]['partitions'])
+
+    def manifest(self, table):
+        # A table's own file is where it lived before partitioning; it is
+        # moved into the first period the first time the manifest is read.
+        legacy = [
+            (os.path.join(self.database_dir, TABLES[name]['file']), TABLES[name].get('partition_suffix', ''))
+            for name in self.partition_group(table)
+        ]
+        return read_manifest(self.partition_dir(table), legacy)
+
+    def log_path(self, table):
+        return self.table_path(table).replace('.csv', '_log.csv')
+
+    def empty_frame(self, table):
+        return pd.DataFrame(columns=TABLES[table]['columns'])
+
+    def source_paths(self, table):
+        paths = [self.table_path(table)]
+        if TABLES[table].get('log'):
+            paths.append(self.log_path(table))
+        return paths
+
+    def load(self, table):
+        return cache.get_frame(table, self.source_paths(table), lambda: self.read(table))
+
+    def table_version(self, table):
+        signatures = tuple(cache.file_signature(path) for path in self.source_paths(table))
+        return (self.writes.get(table, 0),) + signatures
+
+    def load_period(self, table, periode):
+        manifest = self.manifest(table)
+        if periode == manifest['aktif']:
+            return self.load(table)
+        if periode not in manifest['periode']:
+            raise KeyError(f'Periode {periode} tidak ditemukan di tabel {table}')
+        path = self.partition_path(table, periode)
+
+        # A closed period never changes, so its cache entry never goes stale
+        # and is only dropped by eviction.
+        return cache.get_cached((table, periode), ('tertutup', periode), lambda: type_columns(table, pd.read_csv(path)))
+
+    def mark_written(self, table):
+        self.writes[table] = self.writes.get(table, 0) + 1
+        cache.invalidate(table)
+
+    def read(self, table):
+        csv_path = self.table_path(table)
+        if os.path.exists(csv_path) and os.path.getsize(csv_path) > 0:
+            df = pd.read_csv(csv_path)
+        else:
+            df = self.empty_frame(table)
+        df, assigned = ensure_ids(table, df)
+        if assigned:
+            with self.lock(table):
+                self.write_file(table, df)
+
+        if TABLES[table].get('log'):
+            log_path = self.log_path(table)
+            log_df = self.read_log(log_path)
+            if log_df is not None and not log_df.empty:
+                df = self.fold_log(table, df, log_df)
+        return type_columns(table, df, tahun_periode(self, table))
+
+    def read_log(self, log_path):
+        # A record cut short by a crash has no line ending yet; it never
+        # committed, so it is dropped.
+        if not os.path.exists(log_path):
+            return None
+        with open(log_path, encoding='utf-8', newline='') as f:
+            text = f.read()
+        text = text[:text.rfind('\n') + 1]
+        return pd.read_csv(io.StringIO(text)) if text.strip() else None
+
+    def fold_log(self, table, df, log_df):
+        # Records are keyed by row ID; a dict keeps the table order, replaces
+        # an edited row in place and drops a deleted one without shifting
+        # the others. An edit of a row that is already gone is ignored.
+        columns = TABLES[table]['columns']
+        rows = dict(zip(df['ID'], df[columns].values.tolist()))
+        for aksi, row_id, values in zip(log_df['Aksi'], log_df['ID'], log_df[columns].values.tolist()):
+            if aksi == 'hapus':
+                rows.pop(row_id, None)
+            elif aksi == 'tambah' or row_id in rows:
+                rows[row_id] = values
+        return pd.DataFrame(list(rows.values()), columns=columns)
+
+    def position(self, table, row_id):
+        entry = self.indexes.get(table)
+        if entry is None or entry[0] != self.table_version(table):
+            df = self.load(table)
+            entry = (self.table_version(table), pd.Index(df['ID']))
+            self.indexes[table] = entry
+        try:
+            return entry[1].get_loc(row_id)
+        except KeyError:
+            raise KeyError(f'ID {row_id} tidak ditemukan di tabel {table}') from None
+
+    def write_file(self, table, df, csv_path=None):
+        csv_path = csv_path or self.table_path(table)
+        ensure_dir(os.path.dirname(csv_path))
+        replace_file(csv_path, money_for_file(table, df).to_csv(index=False, date_format='%Y-%m-%d'))
+
+    def lock(self, table):
+        # Held only for the compare-and-write itself, never while a caller
+        # prepares its change.
+        with self.locks_guard:
+            return self.locks.setdefault(table, threading.RLock())
+
+    def save(self, table, df, expected=None):
+        with self.lock(table):
+            if expected is not None and self.table_version(table) != expected:
+                raise VersionConflict(f'Tabel {table} sudah diubah oleh sesi lain')
+            if TABLES[table].get('log'):
+                flush_path(self.log_path(table))
+            self.write_file(table, df)
+
+            if TABLES[table].get('log'):
+                log_path = self.log_path(table)
+                if os.path.exists(log_path):
+                    os.remove(log_path)
+                self.log_sizes[table] = 0
+            self.mark_written(table)
+
+    def append_log(self, table, aksi, row):
+        self.append_records(table, [(aksi, row)])
+
+    def append_records(self, table, records):
+        # All records go out in one write. A crash can still cut that write
+        # short; the fragment is skipped by read_log and trimmed off before
+        # the next append, so a multi-line entry is read back whole or not
+        # at all.
+        columns = TABLES[table]['columns']
+        record = pd.DataFrame(
+            [[aksi] + [to_iso(row.get(col)) for col in columns] for aksi, row in records],
+            columns=['Aksi'] + columns
+        )
+        # The lock only fixes the order of the records; waiting for the disk
+        # happens after it is released, so appends from several sessions can
+        # share one group commit. The path is resolved under the lock too, so
+        # a record can't land in a period that was closed meanwhile.
+        with self.lock(table):
+            log_path = self.log_path(table)
+            if log_path not in self.trimmed_logs:
+                flush_path(log_path)
+                if trim_torn_tail(log_path):
+                    self.log_sizes.pop(table, None)
+                self.trimmed_logs.add(log_path)
+            log_size = self.log_size(table)
+            write_header = log_size == 0 and (not os.path.exists(log_path) or os.path.getsize(log_path) == 0)
+            durable = append_text(log_path, record.to_csv(header=write_header, index=False), wait=False)
+            self.log_sizes[table] = log_size + len(records)
+            self.mark_written(table)
+
+            if self.log_sizes[table] >= LOG_COMPACT_THRESHOLD:
+                self.compact(table)
+        try:
+            durable()
+        except OSError:
+            # A failed write may have left a fragment behind.
+            self.trimmed_logs.discard(log_path)
+            raise
+
+    def log_size(self, table):
+        if table not in self.log_sizes:
+            log_path = self.log_path(table)
+            if os.path.exists(log_path):
+                with open(log_path, 'rb') as f:
+                    self.log_sizes[table] = max(sum(1 for _ in f) - 1, 0)
+            else:
+                self.log_sizes[table] = 0
+        return self.log_sizes[table]
+
+    def compact(self, table):
+        with self.lock(table):
+            flush_path(self.log_path(table))
+            self.save(table, self.load(table))
+
+    def add_row(self, table, row):
+        self.add_rows(table, [row])
+
+    def add_rows(self, table, rows):
+        if TABLES[table].get('log'):
+            self.append_records(table, [('tambah', row) for row in rows])
+            return
+        rebase_and_save(self, table, lambda df: pd.concat([df, pd.DataFrame(rows)], ignore_index=True))
+
+    def update_row(self, table, key, row):
+        if TABLES[table].get('log'):
+            # A log record replaces the whole row, so columns the update
+            # leaves out keep their current values.
+            with self.lock(table):
+                current = self.load(table).iloc[self.position(table, key)].to_dict()
+                self.append_log(table, 'ubah', dict(current, **row, ID=key))
+            return
+
+        def change(df):
+            index = row_position(table, df, key)
+            for col, value in row.items():
+                df.loc[index, col] = value
+            return df
+        rebase_and_save(self, table, change)
+
+    def delete_row(self, table, key):
+        if TABLES[table].get('log'):
+            with self.lock(table):
+                self.position(table, key)
+                self.append_log(table, 'hapus', {'ID': key})
+            return
+        rebase_and_save(self, table, lambda df: df.drop(row_position(table, df, key)).reset_index(drop=True))
+
+    def close_period(self, table, sampai, openings, expected=None):
+        tables = self.partition_group(table)
+        with ExitStack() as stack:
+            for name in tables:
+                stack.enter_context(self.lock(name))
+            check_expected(self, expected)
+
+            # Folding the log into the period file is the freeze: from here on
+            # nothing resolves to it for writing.
+            for name in tables:
+                self.save(name, self.load(name))
+            return self.open_next_period(table, sampai, openings)
+
+    def open_next_period(self, table, sampai, openings):
+        # The next period's files are written first; they are not referenced
+        # until the manifest lands, and that single atomic replace is the
+        # commit. A crash before it leaves the period open and untouched.
+        directory = self.partition_dir(table)
+        manifest, baru = close_manifest(self.manifest(table), sampai)
+        for name in self.partition_group(table):
+            df = openings.get(name)
+            df = self.empty_frame(name) if df is None else ensure_ids(name, df)[0]
+            self.write_file(name, df, self.partition_path(name, baru))
+        write_manifest(directory, manifest)
+
+        for name in self.partition_group(table):
+            self.log_sizes[name] = 0
+            self.mark_written(name)
+        return baru
+
+
+class SqliteStorage:
+
+    def __init__(self, database_dir):
+        self.database_dir = database_dir
+        self.db_path = os.path.join(database_dir, 'kricketflow.db')
+        self.local = threading.local()
+        self.csv = CsvStorage(database_dir)
+        self.ready = set()
+        self.locks = {}
+        self.ready_locks = {}
+        self.locks_guard = threading.Lock()
+
+    def lock(self, table):
+        with self.locks_guard:
+            return self.locks.setdefault(table, threading.RLock())
+
+    def ready_lock(self, table):
+        with self.locks_guard:
+            return self.ready_locks.setdefault(table, threading.RLock())
+
+    def connect(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS _versi (tabel TEXT PRIMARY KEY, versi INTEGER NOT NULL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS _periode (tabel TEXT PRIMARY KEY, periode TEXT NOT NULL)')
+            self.local.conn = conn
+        return conn
+
+    def quote(self, name):
+        return '"' + name.replace('"', '""') + '"'
+
+    def ensure_table(self, table):
+        if table in self.ready:
+            return
+        # The first use of a table imports its CSV. Threads of this process
+        # wait for each other on the lock; another process is caught by the
+        # second look inside the write transaction.
+        with self.ready_lock(table):
+            if table in self.ready:
+                return
+            spec = TABLES[table]
+            conn = self.connect()
+            if not self.table_exists(conn, table):
+                column_defs = ', '.join(
+                    f"{self.quote(col)} {'INTEGER' if col in spec['money'] else 'TEXT'}" for col in spec['columns']
+                )
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    if not self.table_exists(conn, table):
+                        conn.execute(f'CREATE TABLE {self.quote(table)} (baris INTEGER PRIMARY KEY AUTOINCREMENT, {column_defs})')
+                        for col in spec['index']:
+                            conn.execute(f'CREATE INDEX IF NOT EXISTS {self.quote(f"idx_{table}_{col}")} ON {self.quote(table)} ({self.quote(col)})')
+
+
+                        if os.path.exists(self.csv.table_path(table)):
+                            self.insert_frame(conn, table, self.csv.load(table))
+                    conn.execute('COMMIT')
+                except Exception:
+                    conn.execute('ROLLBACK')
+                    raise
+            if spec.get('ids'):
+                self.ensure_ids(conn, table)
+            if spec.get('partitions'):
+                self.ensure_period(conn, table)
+            self.ready.add(table)
+
+    def table_exists(self, conn, table):
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone() is not None
+
+    def ensure_period(self, conn, table):
+        # The database holds the open period only. If a close committed its
+        # manifest but stopped before the database caught up, the next start
+        # finishes it from the new period's files.
+        aktif = self.manifest(table)['aktif']
+        row = conn.execute('SELECT periode FROM _periode WHERE tabel = ?', (table,)).fetchone()
+        if row is None:
+            conn.execute('INSERT INTO _periode (tabel, periode) VALUES (?, ?)', (table, aktif))
+        elif row[0] != aktif:
+            self.load_partition(conn, table, aktif)
+
+    def load_partition(self, conn, table, periode):
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(f'DELETE FROM {self.quote(table)}')
+            self.insert_frame(conn, table, self.csv.load(table))
+            conn.execute(
+                'INSERT INTO _periode (tabel, periode) VALUES (?, ?) ON CONFLICT(tabel) DO UPDATE SET periode = excluded.periode',
+                (table, periode)
+            )
+            self.bump_version(conn, table)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def ensure_ids(self, conn, table):
+        # Databases created before rows had IDs get the column, an ID for
+        # every existing row and the unique index that lookups go through.
+        columns = [row[1] for row in conn.execute(f'PRAGMA table_info({self.quote(table)})')]
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if 'ID' not in columns:
+                conn.execute(f'ALTER TABLE {self.quote(table)} ADD COLUMN "ID" TEXT')
+            missing = conn.execute(f'SELECT baris FROM {self.quote(table)} WHERE "ID" IS NULL OR "ID" = \'\'').fetchall()
+            if missing:
+                conn.executemany(f'UPDATE {self.quote(table)} SET "ID" = ? WHERE baris = ?', [(new_id(), row[0]) for row in missing])
+                self.bump_version(conn, table)
+            conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS {self.quote(f"idx_{table}_ID")} ON {self.quote(table)} ("ID")')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def clean_value(self, value):
+        if value is None:
+            return None
+        try:
+            if pd.isna(value):
+                return None
+        except (TypeError, ValueError):
+            pass
+        if isinstance(value, (pd.Timestamp, datetime.date)):
+            return to_iso(value)
+        if hasattr(value, 'item'):
+            return value.item()
+        return value
+
+    def insert_frame(self, conn, table, df):
+        columns = [col for col in TABLES[table]['columns'] if col in df.columns]
+        if not columns or df.empty:
+            return
+        placeholders = ', '.join('?' for _ in columns)
+        col_sql = ', '.join(self.quote(col) for col in columns)
+        rows = [[self.clean_value(value) for value in row] for row in df[columns].itertuples(index=False, name=None)]
+        conn.executemany(f'INSERT INTO {self.quote(table)} ({col_sql}) VALUES ({placeholders})', rows)
+
+    def bump_version(self, conn, table):
+        conn.execute(
+            'INSERT INTO _versi (tabel, versi) VALUES (?, 1) ON CONFLICT(tabel) DO UPDATE SET versi = versi + 1',
+            (table,)
+        )
+
+    def current_version(self, conn, table):
+        row = conn.execute('SELECT versi FROM _versi WHERE tabel = ?', (table,)).fetchone()
+        return ('sqlite', table, row[0] if row else 0)
+
+    def table_version(self, table):
+        self.ensure_table(table)
+        return self.current_version(self.connect(), table)
+
+    def locate(self, conn, table, key):
+        if not TABLES[table].get('ids'):
+            return self.rowid_at(conn, table, key)
+        row = conn.execute(f'SELECT baris FROM {self.quote(table)} WHERE "ID" = ?', (key,)).fetchone()
+        if row is None:
+            raise KeyError(f'ID {key} tidak ditemukan di tabel {table}')
+        return row[0]
+
+    def rowid_at(self, conn, table, index):
+        row = conn.execute(f'SELECT baris FROM {self.quote(table)} ORDER BY baris LIMIT 1 OFFSET ?', (int(index),)).fetchone()
+        if row is None:
+            raise IndexError(f'Baris {index} tidak ditemukan di tabel {table}')
+        return row[0]
+
+    def load(self, table):
+        self.ensure_table(table)
+        columns = TABLES[table]['columns']
+        col_sql = ', '.join(self.quote(col) for col in columns)
+        rows = self.connect().execute(f'SELECT {col_sql} FROM {self.quote(table)} ORDER BY baris').fetchall()
+        return type_columns(table, pd.DataFrame(rows, columns=columns), tahun_periode(self, table))
+
+    def save(self, table, df, expected=None):
+        with self.lock(table):
+            self.ensure_table(table)
+            conn = self.connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                if expected is not None and self.current_version(conn, table) != expected:
+                    raise VersionConflict(f'Tabel {table} sudah diubah oleh sesi lain')
+                conn.execute(f'DELETE FROM {self.quote(table)}')
+                self.insert_frame(conn, table, df)
+                self.bump_version(conn, table)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    def add_row(self, table, row):
+        self.add_rows(table, [row])
+
+    def add_rows(self, table, rows):
+        with self.lock(table):
+            self.ensure_table(table)
+            columns = [col for col in TABLES[table]['columns'] if any(col in row for row in rows)]
+            placeholders = ', '.join('?' for _ in columns)
+            col_sql = ', '.join(self.quote(col) for col in columns)
+            conn = self.connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.executemany(
+                    f'INSERT INTO {self.quote(table)} ({col_sql}) VALUES ({placeholders})',
+                    [[self.clean_value(row.get(col)) for col in columns] for row in rows]
+                )
+                self.bump_version(conn, table)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    def update_row(self, table, key, row):
+        with self.lock(table):
+            self.ensure_table(table)
+            conn = self.connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                rowid = self.locate(conn, table, key)
+                set_sql = ', '.join(f'{self.quote(col)} = ?' for col in row)
+                conn.execute(
+                    f'UPDATE {self.quote(table)} SET {set_sql} WHERE baris = ?',
+                    [self.clean_value(value) for value in row.values()] + [rowid]
+                )
+                self.bump_version(conn, table)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    def delete_row(self, table, key):
+        with self.lock(table):
+            self.ensure_table(table)
+            conn = self.connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                rowid = self.locate(conn, table, key)
+                conn.execute(f'DELETE FROM {self.quote(table)} WHERE baris = ?', (rowid,))
+                self.bump_version(conn, table)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    def compact(self, table):
+        pass
+
+    def manifest(self, table):
+        return self.csv.manifest(table)
+
+    def close_period(self, table, sampai, openings, expected=None):
+        tables = self.csv.partition_group(table)
+        with ExitStack() as stack:
+            for name in tables:
+                stack.enter_context(self.lock(name))
+            check_expected(self, expected)
+
+            # The open period leaves the database as its frozen CSV file.
+            for name in tables:
+                self.csv.write_file(name, self.load(name))
+            baru = self.csv.open_next_period(table, sampai, openings)
+
+            conn = self.connect()
+            for name in tables:
+                self.ensure_table(name)
+                self.load_partition(conn, name, baru)
+            return baru
+
+    def load_period(self, table, periode):
+        # Closed periods stay frozen CSV files whichever backend holds the
+        # open one.
+        if periode == self.manifest(table)['aktif']:
+            return self.load(table)
+        return self.csv.load_period(table, periode)
+
+
+BACKENDS = {
+    'csv': CsvStorage,
+    'sqlite': SqliteStorage
+}
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                backend = os.environ.get('KRICKETFLOW_STORAGE', 'csv').lower()
+                if backend not in BACKENDS:
+                    raise ValueError(f"Storage backend tidak dikenal: {backend} (pilihan: {', '.join(BACKENDS)})")
+                _storage = BACKENDS[backend](get_database_dir())
+    return _storage
+
+def set_storage(storage):
+
+    global _storage
+    _storage = storage
+
+
+def load_table(table):
+    return get_storage().load(table)
+
+def save_table(table, df, expected=None):
+    get_storage().save(table, ensure_ids(table, df)[0], expected=expected)
+
+def update_table(table, change):
+    return rebase_and_save(get_storage(), table, lambda df: ensure_ids(table, change(df))[0])
+
+def add_row(table, row):
+    row = with_id(table, row)
+    get_storage().add_row(table, clean_row(table, row))
+    return row.get('ID')
+
+def add_rows(table, rows):
+    rows = [with_id(table, row) for row in rows]
+    get_storage().add_rows(table, [clean_row(table, row) for row in rows])
+    return [row.get('ID') for row in rows]
+
+def update_row(table, key, row):
+    # Tables with row IDs are addressed by ID, the others by position.
+    get_storage().update_row(table, key, clean_row(table, row))
+
+def delete_row(table, key):
+    get_storage().delete_row(table, key)
+
+def load_period(table, periode):
+    return get_storage().load_period(table, periode)
+
+def table_manifest(table):
+    return get_storage().manifest(table)
+
+def close_period(table, sampai, openings, expected=None):
+    # Freezes the open period of every table partitioned with this one and
+    # opens the next with the given frames; returns the new period.
+    return get_storage().close_period(table, sampai, openings, expected)
+
+def compact_table(table):
+    get_storage().compact(table)
+
+def table_version(table):
+    return get_storage().table_version(table)
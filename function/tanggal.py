@@ -0,0 +1,78 @@
+import pandas as pd
+
+
+BULAN = ['Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni',
+         'Juli', 'Agustus', 'September', 'Oktober', 'November', 'Desember']
+
+BULAN_ALIAS = {
+    'jan': 1, 'feb': 2, 'peb': 2, 'mar': 3, 'apr': 4, 'mei': 5, 'may': 5, 'jun': 6,
+    'jul': 7, 'agu': 8, 'agt': 8, 'ags': 8, 'aug': 8, 'sep': 9, 'okt': 10, 'oct': 10,
+    'nov': 11, 'nop': 11, 'des': 12, 'dec': 12
+}
+
+ISO_PATTERN = r'^(\d{4})-(\d{1,2})-(\d{1,2})'
+TEKS_PATTERN = r'^(\d{1,2})\s+([a-z]+)\.?(?:\s+(\d{2,4}))?$'
+
+
+def infer_tahun(tahun, default=None):
+
+    known = tahun.dropna()
+    if not known.empty:
+        return int(known.mode().iloc[0])
+    return default if default is not None else pd.Timestamp.now().year
+
+def parse_angka(teks, urutan):
+
+    hasil = pd.to_datetime(teks, format=f'{urutan}/%Y', errors='coerce')
+    pendek = hasil.isna() & teks.str.match(r'^\d{1,2}/\d{1,2}/\d{2}$')
+    if pendek.any():
+        hasil[pendek] = pd.to_datetime(teks[pendek], format=f'{urutan}/%y', errors='coerce')
+    return hasil
+
+def parse_teks(teks, tahun):
+
+    kata = teks.str.extract(TEKS_PATTERN)
+    bulan = kata[1].str[:3].map(BULAN_ALIAS)
+    tahun_col = kata[2].astype(float)
+    tahun_col = tahun_col.where(tahun_col.isna() | (tahun_col >= 100), tahun_col + 2000)
+    tahun_col = tahun_col.fillna(tahun).where(bulan.notna())
+    return pd.to_datetime(pd.DataFrame({'year': tahun_col, 'month': bulan, 'day': kata[0].astype(float)}), errors='coerce')
+
+def parse_tanggal(values, tahun=None):
+
+    if isinstance(values, pd.Series) and pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    teks = pd.Series(values, dtype=object).fillna('').astype(str).str.strip().str.lower()
+    hasil = pd.to_datetime(teks.where(teks.str.match(ISO_PATTERN)), format='ISO8601', errors='coerce')
+    
+    
+    # m/d/Y and d/m/Y are both tried; a row valid in only one order is settled,
+    # the ambiguous rows follow whichever order the settled rows show most.
+    sisa = hasil.isna() & (teks != '')
+    if sisa.any():
+        angka = teks[sisa].str.replace(r'[.-]', '/', regex=True)
+        mdy = parse_angka(angka, '%m/%d')
+        dmy = parse_angka(angka, '%d/%m')
+        default_dmy = (dmy.notna() & mdy.isna()).sum() > (mdy.notna() & dmy.isna()).sum()
+        pilihan = dmy.where(dmy.notna() & (default_dmy | mdy.isna()), mdy)
+        hasil[sisa] = pilihan
+    
+    
+    sisa = hasil.isna() & (teks != '')
+    if sisa.any():
+        hasil[sisa] = parse_teks(teks[sisa], infer_tahun(hasil.dt.year, tahun))
+    return hasil
+
+def format_tanggal(values, dengan_tahun=True):
+
+    tanggal = pd.to_datetime(pd.Series(values), errors='coerce')
+    nama_bulan = pd.Series(BULAN, index=range(1, 13)).reindex(tanggal.dt.month).to_numpy()
+    teks = tanggal.dt.day.astype('Int64').astype(str) + ' ' + pd.Series(nama_bulan, index=tanggal.index)
+    if dengan_tahun:
+        teks = teks + ' ' + tanggal.dt.year.astype('Int64').astype(str)
+    return teks.where(tanggal.notna(), '')
+
+def format_periode(periode):
+
+    tahun, bulan = periode.split('-')
+    return f'{BULAN[int(bulan) - 1]} {tahun}'
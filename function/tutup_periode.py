@@ -0,0 +1,143 @@
+import streamlit as st
+import pandas as pd
+from function.formatting import format_rupiah, rupiah
+from function.tanggal import format_tanggal, format_periode
+from function.pipeline import build_all
+import function.neraca
+from function.jurnal_umum import load_jurnal_umum_data, get_jurnal_manifest
+from function.jurnal_saldo_setelah_penutupan import generate_jurnal_saldo
+from function.buku_besar import archive_buku_besar_files
+from function.validasi_jurnal import validate_journal, check_journal_async
+from function.storage import close_period, table_version, VersionConflict, REBASE_RETRIES
+
+
+PERIODE_TABLES = ['jurnal_umum', 'neraca_saldo_periode_sebelumnya', 'akun']
+
+
+def get_periode_aktif():
+
+    manifest = get_jurnal_manifest()
+    return manifest['aktif'], pd.Timestamp(manifest['periode'][manifest['aktif']]['mulai'])
+
+def default_tanggal_tutup():
+
+    # The end of the month of the last journal line.
+    tanggal = load_jurnal_umum_data()['Tanggal'].dropna()
+    awal = tanggal.max() if not tanggal.empty else get_periode_aktif()[1]
+    return (awal + pd.offsets.MonthEnd(0)).date()
+
+def close_errors(tanggal, jurnal_df, saldo_df):
+
+    tanggal = pd.Timestamp(tanggal)
+    mulai = get_periode_aktif()[1]
+    errors = []
+    if tanggal != tanggal + pd.offsets.MonthEnd(0):
+        errors.append("Tanggal tutup buku harus tanggal terakhir dalam bulan.")
+    if tanggal < mulai:
+        errors.append(f"Tanggal tutup buku sebelum awal periode aktif ({format_tanggal([mulai]).iloc[0]}).")
+    if jurnal_df.empty:
+        errors.append("Belum ada transaksi jurnal umum pada periode aktif.")
+        return errors
+
+    terakhir = jurnal_df['Tanggal'].max()
+    if terakhir > tanggal:
+        errors.append(f"Masih ada transaksi setelah tanggal tutup buku, yang terakhir {format_tanggal([terakhir]).iloc[0]}.")
+    masalah = validate_journal(jurnal_df)
+    if not masalah.empty:
+        errors.append(f"Masih ada {len(masalah)} entri jurnal yang bermasalah. Perbaiki dulu melalui menu Jurnal Umum.")
+    selisih = saldo_df['Debet'].sum() - saldo_df['Kredit'].sum()
+    if selisih != 0:
+        errors.append(f"Saldo setelah penutupan tidak seimbang, selisih {rupiah(selisih)}.")
+    return errors
+
+def saldo_awal_berikutnya(saldo_df):
+
+    return pd.DataFrame({
+        'Nama Akun': saldo_df['Nama Akun'].to_numpy(),
+        'Debit': saldo_df['Debet'].to_numpy(),
+        'Kredit': saldo_df['Kredit'].to_numpy()
+    })
+
+def warm_caches():
+
+    # Every report is computed once for the new period so the first page
+    # view after the close is served from cache.
+    build_all()
+    check_journal_async()
+
+def tutup_periode(tanggal):
+
+    # Everything is computed without holding a lock. The close in storage
+    # only commits if none of the tables it came from moved in the
+    # meantime; otherwise it is computed again. The ledger archive is
+    # written from the frozen period once the close has committed.
+    for attempt in range(REBASE_RETRIES):
+        expected = {table: table_version(table) for table in PERIODE_TABLES}
+        periode = get_periode_aktif()[0]
+        jurnal_df = load_jurnal_umum_data()
+        try:
+            saldo_df = generate_jurnal_saldo()
+        except ValueError as e:
+            return [str(e)]
+        errors = close_errors(tanggal, jurnal_df, saldo_df)
+        if errors:
+            return errors
+
+        try:
+            close_period('jurnal_umum', pd.Timestamp(tanggal), {'neraca_saldo_periode_sebelumnya': saldo_awal_berikutnya(saldo_df)}, expected)
+        except VersionConflict:
+            continue
+        archive_buku_besar_files(periode)
+        warm_caches()
+        return []
+    return ["Data terus berubah selama penutupan periode. Silakan coba lagi."]
+
+def show_tutup_periode():
+
+    st.subheader("Tutup Periode")
+
+
+    aktif, mulai = get_periode_aktif()
+    st.write(f"Periode aktif: **{format_periode(aktif)}**, mulai {format_tanggal([mulai]).iloc[0]}.")
+
+
+    try:
+
+        saldo_df = saldo_awal_berikutnya(generate_jurnal_saldo())
+
+        if not saldo_df.empty:
+
+            display_df = saldo_df.copy()
+            for col in ['Debit', 'Kredit']:
+                display_df[col] = format_rupiah(display_df[col], blank_zero=True)
+            st.table(display_df)
+            st.caption("Saldo setelah penutupan di atas menjadi neraca saldo periode sebelumnya untuk periode berikutnya.")
+        else:
+            st.warning("Belum ada saldo akun riil setelah penutupan.")
+    except Exception as e:
+        st.error(f"Terjadi kesalahan: {e}")
+        st.info("Pastikan saldo setelah penutupan dapat disusun dari jurnal umum")
+
+
+    tertutup = sorted(periode for periode, info in get_jurnal_manifest()['periode'].items() if info['status'] == 'tertutup')
+    if tertutup:
+        st.caption("Periode yang sudah ditutup: " + ", ".join(format_periode(periode) for periode in tertutup))
+
+
+    st.markdown("---")
+    with st.form("tutup_periode_form"):
+        tanggal = st.date_input("Tanggal tutup buku", value=default_tanggal_tutup())
+        yakin = st.checkbox("Saya mengerti bahwa jurnal periode ini tidak dapat diubah lagi setelah ditutup.")
+
+        submitted = st.form_submit_button("🔒 Tutup Periode")
+        if submitted:
+            if not yakin:
+                st.error("Centang konfirmasi terlebih dahulu.")
+            else:
+                errors = tutup_periode(tanggal)
+                if errors:
+                    for error in errors:
+                        st.error(error)
+                else:
+                    st.success(f"Periode {format_periode(aktif)} berhasil ditutup.")
+                    st.rerun()
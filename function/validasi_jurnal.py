@@ -0,0 +1,106 @@
+import threading
+import numpy as np
+import pandas as pd
+from concurrent import futures
+from function.akun import resolve_account_names, list_akun
+from function.formatting import to_money, rupiah
+from function.storage import load_table, table_version
+
+
+PEMERIKSAAN = [
+    ('Tidak Seimbang', 'debet dan kredit tidak seimbang'),
+    ('Satu Baris', 'hanya satu baris'),
+    ('Tanpa Tanggal', 'baris pertama tanpa tanggal'),
+    ('Akun Tidak Dikenal', 'akun tidak dikenal'),
+    ('Negatif', 'nominal negatif'),
+    ('Dua Sisi', 'baris berisi debet dan kredit sekaligus'),
+    ('Kosong', 'baris tanpa nominal')
+]
+
+_executor = futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='validasi-jurnal')
+_check = {'version': None, 'future': None}
+_lock = threading.Lock()
+
+
+def line_flags(lines):
+
+    debet = to_money(lines['Debet'])
+    kredit = to_money(lines['Kredit'])
+    return pd.DataFrame({
+        'Debet': debet,
+        'Kredit': kredit,
+        'Akun Tidak Dikenal': ~resolve_account_names(lines['Keterangan']).isin(list_akun()),
+        'Negatif': (debet < 0) | (kredit < 0),
+        'Dua Sisi': (debet != 0) & (kredit != 0),
+        'Kosong': (debet == 0) & (kredit == 0)
+    }, index=lines.index)
+
+def validate_entry(lines):
+
+    if len(lines) < 2:
+        return ["Entri jurnal minimal terdiri dari dua baris."]
+    flags = line_flags(lines)
+    errors = []
+
+    if flags['Akun Tidak Dikenal'].any():
+        names = lines.loc[flags['Akun Tidak Dikenal'], 'Keterangan'].fillna('(kosong)').astype(str)
+        errors.append(f"Akun tidak dikenal: {', '.join(names)}.")
+    if flags['Negatif'].any():
+        errors.append("Nominal debet dan kredit tidak boleh negatif.")
+    if flags['Dua Sisi'].any():
+        errors.append("Satu baris hanya boleh berisi debet atau kredit.")
+    if flags['Kosong'].any():
+        errors.append("Setiap baris harus berisi nominal debet atau kredit.")
+
+    total_debet = flags['Debet'].sum()
+    total_kredit = flags['Kredit'].sum()
+    if total_debet != total_kredit:
+        errors.append(f"Entri tidak seimbang: debet {rupiah(total_debet)}, kredit {rupiah(total_kredit)}.")
+    return errors
+
+def validate_journal(jurnal_df):
+
+    # Entries are numbered the way posting does it: a dated line opens an
+    # entry, undated lines continue it. Everything is summed in one groupby.
+    flags = line_flags(jurnal_df)
+    flags['Entri'] = jurnal_df['Tanggal'].notna().cumsum().to_numpy()
+    flags['Baris'] = np.arange(len(jurnal_df))
+
+    summary = flags.groupby('Entri', sort=False).agg(
+        Baris=('Baris', 'min'),
+        Jumlah=('Baris', 'size'),
+        Debet=('Debet', 'sum'),
+        Kredit=('Kredit', 'sum'),
+        **{kolom: (kolom, 'any') for kolom in ['Akun Tidak Dikenal', 'Negatif', 'Dua Sisi', 'Kosong']}
+    ).reset_index()
+    summary['Tanggal'] = jurnal_df['Tanggal'].iloc[summary['Baris']].to_numpy()
+    summary['Selisih'] = summary['Debet'] - summary['Kredit']
+    summary['Tidak Seimbang'] = summary['Selisih'] != 0
+    summary['Satu Baris'] = summary['Jumlah'] < 2
+    summary['Tanpa Tanggal'] = summary['Entri'] == 0
+
+    masalah = pd.Series('', index=summary.index)
+    for kolom, label in PEMERIKSAAN:
+        masalah = masalah.where(~summary[kolom], masalah + np.where(masalah == '', '', '; ') + label)
+    summary['Masalah'] = masalah
+    return summary.loc[masalah != '', ['Entri', 'Baris', 'Tanggal', 'Debet', 'Kredit', 'Selisih', 'Masalah']].reset_index(drop=True)
+
+def run_journal_check():
+
+    return validate_journal(load_table('jurnal_umum'))
+
+def check_journal_async():
+
+    version = (table_version('jurnal_umum'), table_version('akun'))
+    with _lock:
+        if _check['version'] != version:
+            _check.update(version=version, future=_executor.submit(run_journal_check))
+        return _check['future']
+
+def get_journal_check(wait=0):
+
+    # None means the check for the current journal is still running.
+    future = check_journal_async()
+    if wait:
+        futures.wait([future], timeout=wait)
+    return future.result() if future.done() else None
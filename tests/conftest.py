@@ -0,0 +1,35 @@
+import os
+import sys
+import shutil
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from function import storage, cache
+from function.pipeline import invalidate_pipeline
+
+
+DATABASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database')
+
+
+def make_storage(backend, directory):
+
+    shutil.copytree(DATABASE_DIR, directory, ignore=shutil.ignore_patterns('*.db*', '*_log.csv', 'bukubesar'))
+    return storage.BACKENDS[backend](str(directory))
+
+
+@pytest.fixture(params=['csv', 'sqlite'])
+def backend(request):
+    return request.param
+
+
+@pytest.fixture
+def database(tmp_path, backend):
+    # Every test works on its own copy of the shipped data.
+    storage.set_storage(make_storage(backend, tmp_path / 'database'))
+    cache.invalidate()
+    invalidate_pipeline()
+    yield storage.get_storage()
+    storage.set_storage(None)
+    cache.invalidate()
+    invalidate_pipeline()
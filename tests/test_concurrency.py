@@ -0,0 +1,78 @@
+import threading
+import pytest
+import pandas as pd
+from function import storage
+from conftest import make_storage
+from function.storage import add_row, update_row, update_table, load_table, save_table, table_version, VersionConflict
+
+
+WRITERS = 16
+ROUNDS = 10
+
+
+def run_writers(worker):
+
+    errors = []
+
+    def run(w):
+        try:
+            worker(w)
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=run, args=(w,)) for w in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def test_concurrent_writers_lose_no_rows(database, monkeypatch):
+
+    # A low threshold makes compaction run while other writers append.
+    monkeypatch.setattr(storage, 'LOG_COMPACT_THRESHOLD', 25)
+    saldo_awal = len(load_table('neraca_saldo_periode_sebelumnya'))
+    jurnal_awal = len(load_table('jurnal_umum'))
+
+    def worker(w):
+        for k in range(ROUNDS):
+            add_row('neraca_saldo_periode_sebelumnya', {'Nama Akun': f'w{w}-{k}', 'Debit': k, 'Kredit': 0})
+            row_id = add_row('jurnal_umum', {'Tanggal': '2025-03-30', 'Keterangan': 'Kas', 'Debet': w, 'Kredit': 0})
+            update_row('jurnal_umum', row_id, {'Tanggal': '2025-03-31'})
+            update_table('neraca_saldo_periode_sebelumnya', lambda df: df.assign(Kredit=df['Kredit'] + (df['Nama Akun'] == 'Kas')))
+
+    assert run_writers(worker) == []
+
+    saldo = load_table('neraca_saldo_periode_sebelumnya')
+    assert len(saldo) - saldo_awal == WRITERS * ROUNDS
+    assert saldo['ID'].is_unique
+    assert saldo.loc[saldo['Nama Akun'] == 'Kas', 'Kredit'].iloc[0] == WRITERS * ROUNDS
+
+    jurnal = load_table('jurnal_umum')
+    baru = jurnal.iloc[jurnal_awal:]
+    assert len(baru) == WRITERS * ROUNDS
+    assert jurnal['ID'].is_unique
+    assert (baru['Tanggal'] == pd.Timestamp('2025-03-31')).all()
+    assert (baru['Keterangan'] == 'Kas').all()
+
+
+@pytest.mark.parametrize('table', ['jurnal_umum', 'neraca_saldo_periode_sebelumnya'])
+def test_stale_save_is_rejected(database, table):
+
+    version = table_version(table)
+    df = load_table(table)
+    add_row(table, {'Keterangan': 'Kas', 'Debet': 1} if table == 'jurnal_umum' else {'Nama Akun': 'Kas', 'Debit': 1})
+    with pytest.raises(VersionConflict):
+        save_table(table, df, expected=version)
+    assert len(load_table(table)) == len(df) + 1
+
+
+@pytest.mark.parametrize('table', ['akun', 'jurnal_umum'])
+def test_concurrent_first_use_imports_the_csv_once(tmp_path, table):
+
+    expected = len(make_storage('csv', tmp_path / 'csv').load(table))
+    for trial in range(3):
+        sqlite = make_storage('sqlite', tmp_path / f'sqlite{trial}')
+        loaded = []
+        assert run_writers(lambda w: loaded.append(len(sqlite.load(table)))) == []
+        assert loaded == [expected] * WRITERS
@@ -0,0 +1,80 @@
+import os
+import stat
+import pytest
+from function import storage
+from function.durable import replace_file, append_text, flush_path
+from conftest import make_storage
+
+
+def mode(path):
+
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='POSIX permissions')
+def test_replace_keeps_the_existing_mode(tmp_path):
+
+    path = tmp_path / 'tabel.csv'
+    path.write_text('a\n1\n')
+    os.chmod(path, 0o640)
+    replace_file(str(path), 'a\n2\n')
+    assert path.read_text() == 'a\n2\n'
+    assert mode(path) == 0o640
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='POSIX permissions')
+def test_new_file_gets_the_umask_mode(tmp_path):
+
+    umask = os.umask(0)
+    os.umask(umask)
+    reference = tmp_path / 'biasa.csv'
+    reference.write_text('')
+    path = tmp_path / 'baru.csv'
+    replace_file(str(path), 'a\n')
+    assert mode(path) == mode(reference)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+def test_appends_are_on_disk_after_flush(tmp_path):
+
+    path = str(tmp_path / 'log.csv')
+    waits = [append_text(path, f'{i}\n', wait=False) for i in range(50)]
+    flush_path(path)
+    for wait in waits:
+        wait()
+    with open(path) as f:
+        assert f.read() == ''.join(f'{i}\n' for i in range(50))
+
+
+def test_torn_log_record_is_trimmed_before_the_next_append(tmp_path):
+
+    csv = make_storage('csv', tmp_path / 'database')
+    csv.add_row('jurnal_umum', {'Tanggal': '2025-03-30', 'Keterangan': 'Kas', 'Debet': 5, 'Kredit': 0})
+    rows = len(csv.load('jurnal_umum'))
+
+    # A crash in the middle of the next record leaves it without its line
+    # ending; the restarted app must neither read it nor append behind it.
+    log_path = csv.log_path('jurnal_umum')
+    with open(log_path, 'a', newline='', encoding='utf-8') as f:
+        f.write('tambah,deadbeef,2025-03-30,Ka')
+
+    csv = storage.CsvStorage(csv.database_dir)
+    assert len(csv.load('jurnal_umum')) == rows
+    csv.add_row('jurnal_umum', {'Tanggal': '2025-03-30', 'Keterangan': 'Modal', 'Debet': 0, 'Kredit': 5})
+    df = csv.load('jurnal_umum')
+    assert len(df) == rows + 1
+    assert df['Keterangan'].iloc[-1] == 'Modal'
+    with open(log_path, encoding='utf-8') as f:
+        assert 'deadbeef' not in f.read()
+
+
+def test_torn_log_header_is_written_again(tmp_path):
+
+    csv = make_storage('csv', tmp_path / 'database')
+    rows = len(csv.load('jurnal_umum'))
+    with open(csv.log_path('jurnal_umum'), 'w', newline='', encoding='utf-8') as f:
+        f.write('Aksi,ID,Tang')
+
+    csv = storage.CsvStorage(csv.database_dir)
+    csv.add_row('jurnal_umum', {'Tanggal': '2025-03-30', 'Keterangan': 'Kas', 'Debet': 5, 'Kredit': 0})
+    assert len(csv.load('jurnal_umum')) == rows + 1
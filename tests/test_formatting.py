@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+from function.formatting import format_rupiah, rupiah
+
+
+@pytest.mark.parametrize('value, expected', [
+    (78700000, 'Rp 78.700.000,00'),
+    (1000, 'Rp 1.000,00'),
+    (999, 'Rp 999,00'),
+    (5, 'Rp 5,00'),
+    (0, 'Rp 0,00'),
+    (-1234567, 'Rp -1.234.567,00'),
+    (1.5, 'Rp 1,50'),
+    (-0.004, 'Rp 0,00'),
+    (np.nan, 'Rp 0,00'),
+    (None, 'Rp 0,00'),
+    (np.int64(2 ** 40), 'Rp 1.099.511.627.776,00'),
+])
+def test_rupiah(value, expected):
+
+    assert rupiah(value) == expected
+
+
+@pytest.mark.parametrize('values, blank_zero, expected', [
+    (pd.Series([0, 5, -5], dtype='int64'), True, ['', 'Rp 5,00', 'Rp -5,00']),
+    (pd.Series([0, 5, -5], dtype='int64'), False, ['Rp 0,00', 'Rp 5,00', 'Rp -5,00']),
+    (pd.Series([1000000, 7, np.nan]), True, ['Rp 1.000.000,00', 'Rp 7,00', '']),
+    (pd.Series([12, -3400], dtype=object), False, ['Rp 12,00', 'Rp -3.400,00']),
+    (pd.Series([], dtype='int64'), False, []),
+])
+def test_format_rupiah_columns(values, blank_zero, expected):
+
+    assert list(format_rupiah(values, blank_zero=blank_zero)) == expected
+
+
+def test_format_rupiah_keeps_the_index():
+
+    values = pd.Series([1, 2], index=[10, 20], dtype='int64')
+    assert list(format_rupiah(values).index) == [10, 20]
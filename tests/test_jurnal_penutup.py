@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+import function.jurnal_penutup
+import function.lap_perubahanmodal
+from function.pipeline import build
+from function.posting import tanggal_akhir
+from function.storage import load_table, save_table
+from function.tutup_periode import tutup_periode
+from function.jurnal_umum import add_jurnal_entry
+
+
+def test_tanggal_akhir_is_the_latest_date():
+
+    posted = pd.DataFrame({'Tanggal': pd.to_datetime(['2025-03-20', '2025-03-31', None, '2025-03-05'])})
+    assert tanggal_akhir(posted) == pd.Timestamp('2025-03-31')
+    assert tanggal_akhir(posted.iloc[2:3]) is None
+
+
+def test_missing_closing_account_is_reported(database):
+
+    akun = load_table('akun')
+    save_table('akun', akun[akun['Akun'] != 'prive'])
+
+    with pytest.raises(ValueError, match='prive'):
+        build('jurnal_penutup')
+    assert any('prive' in error for error in tutup_periode('2025-03-31'))
+
+
+def test_every_prive_account_is_closed_into_modal(database):
+
+    akun = load_table('akun')
+    anak = pd.DataFrame([{'Kode': 303, 'Akun': 'priveanak', 'Nama Akun': 'Prive anak', 'Tipe': 'ekuitas', 'Saldo Normal': 'debet', 'Kelompok': 'prive'}])
+    save_table('akun', pd.concat([akun, anak], ignore_index=True))
+    lines = pd.DataFrame({'Akun': ['Prive anak', 'Kas'], 'Debet': [1000, 0], 'Kredit': [0, 1000]})
+    assert add_jurnal_entry('2025-03-30', lines) == []
+
+    penutup = build('jurnal_penutup').set_index('Akun')
+    assert penutup.loc['priveanak', 'Kredit'] == 1000
+
+    saldo = build('jurnal_saldo_setelah_penutupan').set_index('Akun')
+    assert 'prive' not in saldo.index and 'priveanak' not in saldo.index
+    modal_akhir = build('lap_perubahanmodal')['Kredit'].iloc[-1]
+    assert saldo.loc['modal', 'Kredit'] - saldo.loc['modal', 'Debet'] == modal_akhir
+
+
+def test_missing_modal_account_is_reported(database):
+
+    akun = load_table('akun')
+    save_table('akun', akun[akun['Kelompok'] != 'ekuitas'])
+
+    with pytest.raises(ValueError, match='ekuitas'):
+        build('lap_perubahanmodal')
@@ -0,0 +1,93 @@
+import pandas as pd
+import function.jurnal_umum as jurnal_umum
+from function.storage import update_table
+from function.jurnal_umum import (
+    add_jurnal_entry,
+    edit_jurnal_data,
+    delete_jurnal_data,
+    delete_jurnal_entry,
+    load_jurnal_umum_data
+)
+
+
+def add_kas_modal(jumlah=500):
+
+    lines = pd.DataFrame({'Akun': ['Kas', 'Modal'], 'Debet': [jumlah, 0], 'Kredit': [0, jumlah]})
+    assert add_jurnal_entry('2025-03-30', lines) == []
+    return load_jurnal_umum_data().iloc[-2:]
+
+
+def test_unbalanced_add_is_rejected(database):
+
+    lines = pd.DataFrame({'Akun': ['Kas', 'Modal'], 'Debet': [700, 0], 'Kredit': [0, 500]})
+    assert add_jurnal_entry('2025-03-30', lines)
+    assert len(load_jurnal_umum_data()) == 39
+
+
+def test_edit_that_unbalances_the_entry_is_rejected(database):
+
+    kas, modal = add_kas_modal()['ID']
+    assert edit_jurnal_data(kas, '2025-03-30', 'Kas', 700, 0)
+    assert load_jurnal_umum_data().set_index('ID').loc[kas, 'Debet'] == 500
+    assert edit_jurnal_data(modal, None, 'Modal', 0, 500) == []
+
+
+def test_edit_that_balances_the_entry_is_accepted(database):
+
+    # The shipped Perlengkapan/Kas entry is 1.000.000 out.
+    jurnal = load_jurnal_umum_data()
+    row_id = jurnal.loc[2, 'ID']
+    assert edit_jurnal_data(row_id, '2025-03-01', 'Perlengkapan', 1600000, 0) == []
+    assert load_jurnal_umum_data().loc[2, 'Debet'] == 1600000
+
+
+def test_deleting_one_line_of_an_entry_is_rejected(database):
+
+    kas, modal = add_kas_modal()['ID']
+    assert delete_jurnal_data(modal)
+    assert len(load_jurnal_umum_data()) == 41
+
+    delete_jurnal_entry(modal)
+    jurnal = load_jurnal_umum_data()
+    assert len(jurnal) == 39
+    assert not jurnal['ID'].isin([kas, modal]).any()
+
+
+def test_date_before_the_open_period_is_rejected(database):
+
+    lines = pd.DataFrame({'Akun': ['Kas', 'Modal'], 'Debet': [500, 0], 'Kredit': [0, 500]})
+    assert add_jurnal_entry('2025-02-28', lines)
+    assert len(load_jurnal_umum_data()) == 39
+
+    kas = add_kas_modal()['ID'].iloc[0]
+    assert edit_jurnal_data(kas, '2025-02-28', 'Kas', 500, 0)
+    assert load_jurnal_umum_data().set_index('ID').loc[kas, 'Tanggal'] == pd.Timestamp('2025-03-30')
+
+
+def test_edit_is_checked_against_the_table_it_is_saved_over(database, monkeypatch):
+
+    lines = pd.DataFrame({'Akun': ['Kas', 'Modal', 'Kas', 'Modal'], 'Debet': [500, 0, 300, 0], 'Kredit': [0, 500, 0, 300]})
+    assert add_jurnal_entry('2025-03-30', lines) == []
+    ids = list(load_jurnal_umum_data()['ID'].iloc[-4:])
+
+    # Another session moves amounts between the lines of the same entry
+    # after this edit has read the table; split at the third line, the
+    # entry would then be unbalanced in both halves.
+    def other_session(df):
+        df = df.copy()
+        posisi = df.index[df['ID'].isin(ids)]
+        df.loc[posisi, 'Debet'] = [500, 0, 300, 0]
+        df.loc[posisi, 'Kredit'] = [0, 300, 0, 500]
+        return df
+    calls = []
+    entry_rows = jurnal_umum.entry_rows
+
+    def interleaved(df, positions):
+        if not calls:
+            calls.append(1)
+            update_table('jurnal_umum', other_session)
+        return entry_rows(df, positions)
+    monkeypatch.setattr(jurnal_umum, 'entry_rows', interleaved)
+
+    assert edit_jurnal_data(ids[2], '2025-03-30', 'Kas', 300, 0)
+    assert load_jurnal_umum_data().set_index('ID').loc[ids[2], 'Tanggal'] is pd.NaT
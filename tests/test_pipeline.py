@@ -0,0 +1,38 @@
+import function.neraca
+import function.lap_labarugi
+import function.lap_perubahanmodal
+from function.pipeline import build, build_all, last_rebuilt, invalidate_pipeline
+from function.storage import load_table, update_row
+
+
+def saldo(name):
+
+    neraca_saldo = build('neraca_saldo').set_index('Akun')
+    return neraca_saldo.loc[name, ['Debet', 'Kredit']].tolist() if name in neraca_saldo.index else None
+
+
+def test_account_change_alone_rebuilds_neraca_saldo(database):
+
+    assert saldo('bebansewa') == [400000, 0]
+    jurnal = load_table('jurnal_umum')
+    row_id = jurnal.loc[jurnal['Keterangan'] == 'Beban Sewa', 'ID'].iloc[0]
+
+    # Same amount, same side, only the account moves.
+    update_row('jurnal_umum', row_id, {'Keterangan': 'Prive'})
+
+    assert saldo('bebansewa') is None
+    assert last_rebuilt().set_index('Node').loc['buku_besar', 'Berubah']
+    assert saldo('prive') == [400000, 0]
+
+
+def test_incremental_reports_match_a_cold_rebuild(database):
+
+    build_all()
+    jurnal = load_table('jurnal_umum')
+    accounts = ['Kas', 'Prive', 'Beban gaji', 'Perlengkapan', 'Modal', 'Beban sewa']
+    for i, row_id in enumerate(jurnal['ID'].iloc[::3]):
+        update_row('jurnal_umum', row_id, {'Keterangan': accounts[i % len(accounts)]})
+        warm = {name: build(name) for name in ['neraca_saldo', 'neraca', 'lap_labarugi', 'lap_perubahanmodal']}
+        invalidate_pipeline()
+        for name, frame in warm.items():
+            assert frame.equals(build(name)), name
@@ -0,0 +1,39 @@
+import function.posting as posting
+from function.posting import refresh_posting, balance_as_of
+from function.storage import load_table, update_row
+
+
+def test_unchanged_journal_is_not_reloaded(database, monkeypatch):
+
+    loads = []
+    load = posting.load_jurnal_umum_data
+    monkeypatch.setattr(posting, 'load_jurnal_umum_data', lambda: loads.append(1) or load())
+
+    kas = balance_as_of('kas', '2025-12-31')
+    refresh_posting()
+    balance_as_of('kas', '2025-12-31')
+    assert len(loads) == 1
+
+    jurnal = load_table('jurnal_umum')
+    baris = jurnal.index[(jurnal['Keterangan'] == 'Kas') & (jurnal['Debet'] > 0)][0]
+    update_row('jurnal_umum', jurnal.loc[baris, 'ID'], {'Debet': jurnal.loc[baris, 'Debet'] + 1000})
+    assert balance_as_of('kas', '2025-12-31') == kas + 1000
+    assert len(loads) == 2
+
+
+def test_opening_balances_are_read_once_per_version(database, monkeypatch):
+
+    loads = []
+    load = posting.load_saldo_awal_data
+    monkeypatch.setattr(posting, 'load_saldo_awal_data', lambda: loads.append(1) or load())
+
+    kas = balance_as_of('kas', '2025-12-31')
+    for _ in range(5):
+        balance_as_of('kas', '2025-12-31')
+    assert len(loads) == 1
+
+    saldo = load_table('neraca_saldo_periode_sebelumnya')
+    baris = saldo.index[saldo['Nama Akun'] == 'Kas'][0]
+    update_row('neraca_saldo_periode_sebelumnya', saldo.loc[baris, 'ID'], {'Debit': saldo.loc[baris, 'Debit'] + 1000})
+    assert balance_as_of('kas', '2025-12-31') == kas + 1000
+    assert len(loads) == 2
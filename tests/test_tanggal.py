@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+from function.tanggal import parse_tanggal, format_tanggal
+
+
+def tanggal(*values):
+
+    return [pd.Timestamp(value) if value else pd.NaT for value in values]
+
+
+@pytest.mark.parametrize('values, tahun, expected', [
+    # Month first: 3/30 only works that way, so 3/4 is read as 4 March.
+    (['3/30/2025', '3/4/2025'], None, tanggal('2025-03-30', '2025-03-04')),
+    # Day first: 30/3 only works that way, so 3/4 is read as 3 April.
+    (['30/3/2025', '3/4/2025'], None, tanggal('2025-03-30', '2025-04-03')),
+    (['2025-03-01', '2025-3-9'], None, tanggal('2025-03-01', '2025-03-09')),
+    (['30-03-25', '01.02.25'], None, tanggal('2025-03-30', '2025-02-01')),
+    (['01/02/25'], None, tanggal('2025-01-02')),
+    (['1 Maret', '14 mar.', '5 des', '2 Peb'], 2025, tanggal('2025-03-01', '2025-03-14', '2025-12-05', '2025-02-02')),
+    (['15 Agustus 2024', '1 Maret 25', '7 Okt'], 2023, tanggal('2024-08-15', '2025-03-01', '2023-10-07')),
+    # A date without a year takes the year most of the dated rows have.
+    (['2024-03-02', '2024-03-05', '1 Maret'], 2025, tanggal('2024-03-02', '2024-03-05', '2024-03-01')),
+    (['', None, 'abc', '31 Februari'], 2025, tanggal(None, None, None, None)),
+])
+def test_parse_tanggal(values, tahun, expected):
+
+    assert list(parse_tanggal(pd.Series(values, dtype=object), tahun)) == expected
+
+
+def test_parsed_dates_pass_through():
+
+    values = pd.Series(pd.to_datetime(['2025-03-01', None]))
+    assert parse_tanggal(values) is values
+
+
+def test_format_tanggal():
+
+    assert list(format_tanggal(tanggal('2025-03-01', None, '2024-12-31'))) == ['1 Maret 2025', '', '31 Desember 2024']
+    assert list(format_tanggal(tanggal('2025-08-17'), dengan_tahun=False)) == ['17 Agustus']
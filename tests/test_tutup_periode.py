@@ -0,0 +1,57 @@
+import os
+import pandas as pd
+import pytest
+
+import function.tutup_periode as tutup_periode_module
+import function.buku_besar as buku_besar
+from function import storage
+from function.storage import VersionConflict
+from function.jurnal_umum import load_jurnal_umum_data, get_jurnal_manifest
+from function.neraca_periode_sebelumnya import load_neraca_saldo_data
+from function.tutup_periode import tutup_periode, default_tanggal_tutup
+from function.posting import build_ledger_sheet
+
+
+@pytest.fixture
+def bukubesar_dir(tmp_path, monkeypatch):
+    directory = tmp_path / 'bukubesar'
+    directory.mkdir()
+    monkeypatch.setattr(buku_besar, 'get_bukubesar_dir', lambda: str(directory))
+    return directory
+
+
+def make_closeable():
+
+    # The shipped journal has one unbalanced entry and opening balances that
+    # do not balance either; both have to be fixed before a close is allowed.
+    jurnal_df = load_jurnal_umum_data()
+    baris = jurnal_df.index[(jurnal_df['Keterangan'] == 'Kas') & (jurnal_df['Kredit'] == 1600000)][0]
+    storage.update_row('jurnal_umum', jurnal_df.loc[baris - 1, 'ID'], {'Debet': 1600000})
+    storage.save_table('neraca_saldo_periode_sebelumnya', load_neraca_saldo_data().iloc[:5])
+
+
+def test_close_archives_the_frozen_period(database, bukubesar_dir):
+    make_closeable()
+    periode = get_jurnal_manifest()['aktif']
+    expected = {akun: build_ledger_sheet(akun) for akun in buku_besar.get_bukubesar_accounts()}
+
+    assert tutup_periode(default_tanggal_tutup()) == []
+
+    archived = sorted(os.listdir(bukubesar_dir / periode))
+    assert archived == sorted(buku_besar.get_filename_from_account(akun) for akun, sheet in expected.items() if not sheet.empty)
+    kas = pd.read_csv(bukubesar_dir / periode / buku_besar.get_filename_from_account('kas'))
+    assert kas['Debet'].sum() == expected['kas']['Debet'].sum()
+    assert kas['Kredit'].sum() == expected['kas']['Kredit'].sum()
+
+
+def test_failed_close_leaves_no_archive(database, bukubesar_dir, monkeypatch):
+    make_closeable()
+    periode = get_jurnal_manifest()['aktif']
+
+    def conflict(*args):
+        raise VersionConflict('jurnal_umum')
+    monkeypatch.setattr(tutup_periode_module, 'close_period', conflict)
+
+    assert tutup_periode(default_tanggal_tutup()) != []
+    assert get_jurnal_manifest()['aktif'] == periode
+    assert not os.path.exists(bukubesar_dir / periode)